@@ -0,0 +1,224 @@
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from eye_tracker import CalibrationSystem, FramePreprocessor, PupilDetector
+from recording import RECORDING_EXTENSION, open_recording
+
+
+GAZE_FIELDS = ['frame', 'pupil_x', 'pupil_y', 'gaze_x', 'gaze_y', 'confidence']
+GAZE_RECORD_DTYPE = np.dtype([
+    ('frame', '<u8'),
+    ('pupil_x', '<f8'),
+    ('pupil_y', '<f8'),
+    ('gaze_x', '<f8'),
+    ('gaze_y', '<f8'),
+    ('confidence', '<f4'),
+])
+
+
+class FrameSource:
+    def __init__(self, path):
+        self.path = path
+        if os.path.isdir(path):
+            self.files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.endswith('.npy'))
+            self.frames = None
+        elif path.endswith(RECORDING_EXTENSION):
+            self.files = None
+            self.frames = open_recording(path)['frame']
+        else:
+            self.files = None
+            self.frames = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.files) if self.files is not None else len(self.frames)
+
+    def __getitem__(self, index):
+        if self.files is not None:
+            return np.load(self.files[index])
+        return self.frames[index]
+
+
+_worker_source = None
+_worker_calibration = None
+_worker_pyramid_levels = 1
+
+
+def _init_worker(frames_path, calibration_path, pyramid_levels=1):
+    global _worker_source, _worker_calibration, _worker_pyramid_levels
+    _worker_source = FrameSource(frames_path)
+    _worker_calibration = CalibrationSystem()
+    _worker_calibration.load(calibration_path)
+    _worker_pyramid_levels = pyramid_levels
+
+
+def process_frames(frames, calibration, pyramid_levels=1):
+    pupils = np.full((len(frames), 7), math.nan)
+    pupils[:, 6] = 0.0
+    preprocessor = FramePreprocessor()
+    for i, frame in enumerate(frames):
+        pupil = PupilDetector.detect(frame, pyramid_levels=pyramid_levels, preprocessor=preprocessor)
+        if pupil is None:
+            continue
+        left, right = pupil['corners']
+        pupils[i, :2] = pupil['center']
+        if left and right:
+            pupils[i, 2:6] = left + right
+        pupils[i, 6] = pupil['confidence']
+
+    gaze = calibration.map_gaze_batch(
+        CalibrationSystem.gaze_vectors(pupils[:, :2], pupils[:, 2:4], pupils[:, 4:6]))
+    if gaze is None:
+        gaze = np.full((len(frames), 2), math.nan)
+
+    return [(pupil_x, pupil_y, gaze_x, gaze_y, confidence)
+            for (pupil_x, pupil_y, *_, confidence), (gaze_x, gaze_y)
+            in zip(pupils.tolist(), gaze.tolist())]
+
+
+def _process_chunk(chunk):
+    start, end = chunk
+    rows = process_frames([_worker_source[index] for index in range(start, end)], _worker_calibration,
+                          _worker_pyramid_levels)
+    return [(index,) + row for index, row in zip(range(start, end), rows)]
+
+
+class GazeWriter:
+    def __init__(self, path, output_format, offset=0):
+        self.format = output_format
+        exists = os.path.exists(path) and offset > 0
+        if output_format == 'csv':
+            self.file = open(path, 'r+' if exists else 'w', newline='')
+        else:
+            self.file = open(path, 'r+b' if exists else 'wb')
+
+        if exists:
+            self.file.seek(offset)
+            self.file.truncate()
+        elif output_format == 'csv':
+            csv.writer(self.file).writerow(GAZE_FIELDS)
+
+        self.writer = csv.writer(self.file) if output_format == 'csv' else None
+
+    def write(self, rows):
+        if self.format == 'csv':
+            self.writer.writerows(rows)
+        else:
+            self.file.write(np.array(rows, dtype=GAZE_RECORD_DTYPE).tobytes())
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class BatchProcessor:
+    def __init__(self, frames_path, calibration_path, output_path, output_format='csv',
+                 workers=None, chunk_size=64, checkpoint_path=None, pyramid_levels=1):
+        self.frames_path = frames_path
+        self.calibration_path = calibration_path
+        self.output_path = output_path
+        self.output_format = output_format
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path or output_path + '.checkpoint'
+        self.pyramid_levels = pyramid_levels
+
+    def load_checkpoint(self, total_frames):
+        if not os.path.exists(self.checkpoint_path) or not os.path.exists(self.output_path):
+            return 0, 0
+
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+
+        if (checkpoint.get('frames') != os.path.abspath(self.frames_path) or
+                checkpoint.get('total_frames') != total_frames or
+                checkpoint.get('format') != self.output_format):
+            return 0, 0
+
+        return checkpoint['next_frame'], checkpoint['offset']
+
+    def save_checkpoint(self, total_frames, next_frame, offset):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'frames': os.path.abspath(self.frames_path),
+                'total_frames': total_frames,
+                'format': self.output_format,
+                'next_frame': next_frame,
+                'offset': offset
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def run(self, resume=True, report=None):
+        total_frames = len(FrameSource(self.frames_path))
+        next_frame, offset = self.load_checkpoint(total_frames) if resume else (0, 0)
+
+        chunks = [(start, min(start + self.chunk_size, total_frames))
+                  for start in range(next_frame, total_frames, self.chunk_size)]
+
+        writer = GazeWriter(self.output_path, self.output_format, offset)
+        start_time = time.time()
+        processed = 0
+
+        try:
+            with multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                      initargs=(self.frames_path, self.calibration_path,
+                                                self.pyramid_levels)) as pool:
+                for rows in pool.imap(_process_chunk, chunks):
+                    offset = writer.write(rows)
+                    next_frame = rows[-1][0] + 1
+                    processed += len(rows)
+                    self.save_checkpoint(total_frames, next_frame, offset)
+
+                    if report:
+                        elapsed = time.time() - start_time
+                        report(next_frame, total_frames, processed / elapsed if elapsed > 0 else 0.0)
+        finally:
+            writer.close()
+
+        if next_frame >= total_frames and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        elapsed = time.time() - start_time
+        return {
+            'frames': processed,
+            'seconds': elapsed,
+            'fps': processed / elapsed if elapsed > 0 else 0.0
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kayıtlı oturumlar için toplu pupil tespiti ve gaze eşleme")
+    parser.add_argument('frames', help="Kare dizini (*.npy), (N, H, W, 3) boyutlu .npy dosyası "
+                                       "veya " + RECORDING_EXTENSION + " kaydı")
+    parser.add_argument('--calibration', required=True, help="Kaydedilmiş kalibrasyon (JSON)")
+    parser.add_argument('--output', required=True, help="Çıktı dosyası")
+    parser.add_argument('--format', choices=['csv', 'bin'], default='csv')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--no-resume', action='store_true')
+    parser.add_argument('--pyramid-levels', type=int, default=1,
+                        help="Kaba-ince arama için piramit seviyesi (1 = yalnızca tam çözünürlük)")
+    args = parser.parse_args(argv)
+
+    def report(done, total, fps):
+        print(f"\r{done}/{total} kare, {fps:.1f} FPS", end='', file=sys.stderr, flush=True)
+
+    processor = BatchProcessor(args.frames, args.calibration, args.output, args.format,
+                               args.workers, args.chunk_size, pyramid_levels=args.pyramid_levels)
+    stats = processor.run(resume=not args.no_resume, report=report)
+    print(f"\n{stats['frames']} kare {stats['seconds']:.1f} sn'de işlendi ({stats['fps']:.1f} FPS)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
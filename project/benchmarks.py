@@ -0,0 +1,181 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from eye_tracker import CalibrationSystem, FramePreprocessor, ImageProcessing, PupilDetector, SyntheticCamera
+
+
+RESOLUTIONS = {
+    'qvga': (240, 320),
+    'vga': (480, 640),
+    '720p-eye': (360, 1280),
+}
+
+BLOCK_SIZES = [11, 31]
+TILE_SIZES = [8, 32]
+KERNEL_SIZES = [3, 9]
+MAPPING_DEGREES = [1, 2, 3]
+PYRAMID_LEVELS = [1, 3]
+
+
+def make_inputs(height, width, seed=0):
+    camera = SyntheticCamera(width, height, seed=seed, noise=4.0)
+    camera.generate_next()
+    frame = np.array(camera.read_frame())
+    gray = ImageProcessing.rgb_to_gray(frame)
+    binary = ImageProcessing.adaptive_threshold(gray, block_size=11, c=5)
+    return {'frame': frame, 'gray': gray, 'binary': binary}
+
+
+def make_calibration_samples(n_samples=240, seed=0):
+    rng = np.random.default_rng(seed)
+    gaze = rng.normal(0, 20, (n_samples, 3))
+    X = [[gx, gy, gz, gx * gy, 1] for gx, gy, gz in gaze.tolist()]
+    Y = (gaze @ [12.0, 3.0, 0.5] + 640).tolist()
+    return X, Y
+
+
+def make_calibration(degree, n_samples=40, seed=0):
+    rng = np.random.default_rng(seed)
+    calibration = CalibrationSystem(degree=degree)
+    for gx, gy in rng.uniform(-20, 20, (n_samples, 2)).tolist():
+        calibration.add_calibration_sample(
+            (640 + 12 * gx + 0.2 * gx * gx, 400 + 10 * gy),
+            ((320 + gx, 240 + gy), ((306.0, 240.0), (334.0, 240.0)))
+        )
+    calibration.compute_mapping()
+    return calibration
+
+
+def build_cases(resolutions):
+    cases = []
+    for name, (height, width) in resolutions.items():
+        inputs = make_inputs(height, width)
+        frame, gray, binary = inputs['frame'], inputs['gray'], inputs['binary']
+
+        cases.append((f'rgb_to_gray/{name}', lambda f=frame: ImageProcessing.rgb_to_gray(f)))
+        cases.append((f'sobel_edges/{name}', lambda g=gray: ImageProcessing.sobel_edges(g)))
+        cases.append((f'find_contours/{name}', lambda b=binary: ImageProcessing.find_contours(b)))
+        cases.append((f'label_components/{name}', lambda b=binary: ImageProcessing.label_components(b)))
+        cases.append((f'downsample/{name}', lambda g=gray: ImageProcessing.downsample(g)))
+        for levels in PYRAMID_LEVELS:
+            cases.append((f'detect/{name}/pyramid_levels={levels}',
+                          lambda f=frame, n=levels: PupilDetector.detect(f, pyramid_levels=n)))
+        preprocessor = FramePreprocessor()
+        cases.append((f'detect/{name}/reused_buffers',
+                      lambda f=frame, p=preprocessor: PupilDetector.detect(f, preprocessor=p)))
+        cases.append((f'clahe_threshold/{name}/fused',
+                      lambda g=gray, p=preprocessor: p.threshold(p.enhance(g), 11, 5)))
+        cached = FramePreprocessor(histogram_tolerance=2.0)
+        cases.append((f'detect/{name}/histogram_cache',
+                      lambda f=frame, p=cached: PupilDetector.detect(f, preprocessor=p)))
+        for tile_size in TILE_SIZES:
+            cases.append((f'clahe/{name}/tile_size={tile_size}',
+                          lambda g=gray, t=tile_size: ImageProcessing.clahe(g, tile_size=t)))
+        for block_size in BLOCK_SIZES:
+            cases.append((f'adaptive_threshold/{name}/block_size={block_size}',
+                          lambda g=gray, b=block_size: ImageProcessing.adaptive_threshold(g, b, 5)))
+        for kernel_size in KERNEL_SIZES:
+            cases.append((f'erode/{name}/kernel_size={kernel_size}',
+                          lambda b=binary, k=kernel_size: ImageProcessing.erode(b, k)))
+            cases.append((f'dilate/{name}/kernel_size={kernel_size}',
+                          lambda b=binary, k=kernel_size: ImageProcessing.dilate(b, k)))
+
+    X, Y = make_calibration_samples()
+    cases.append(('least_squares/n=240', lambda: CalibrationSystem.least_squares(X, Y)))
+
+    gaze = np.random.default_rng(0).normal(0, 20, (10000, 3))
+    for degree in MAPPING_DEGREES:
+        calibration = make_calibration(degree)
+        cases.append((f'map_gaze_batch/n=10000/degree={degree}',
+                      lambda c=calibration: c.map_gaze_batch(gaze)))
+    return cases
+
+
+def measure(func, repeat=20, warmup=2):
+    for _ in range(warmup):
+        func()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times_ms = np.array(times) * 1000
+    return {
+        'median_ms': float(np.median(times_ms)),
+        'p95_ms': float(np.percentile(times_ms, 95)),
+        'peak_kib': peak / 1024,
+        'repeat': repeat
+    }
+
+
+def run_benchmarks(name_filter=None, resolutions=None, repeat=20, report=None):
+    results = {}
+    for name, func in build_cases(resolutions or RESOLUTIONS):
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(func, repeat)
+        if report:
+            report(name, results[name])
+    return results
+
+
+def compare_to_baseline(results, baseline, max_regression=0.2):
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = reference['median_ms'] * (1 + max_regression)
+        if result['median_ms'] > limit:
+            regressions.append((name, reference['median_ms'], result['median_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ImageProcessing temel işlemleri için mikro kıyaslamalar")
+    parser.add_argument('--filter', default=None, help="Yalnızca adında bu metin geçen durumlar")
+    parser.add_argument('--resolution', action='append', choices=sorted(RESOLUTIONS))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=None, help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument('--baseline', default=None, help="Karşılaştırılacak temel JSON dosyası")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="İzin verilen medyan gerileme oranı (0.2 = %%20)")
+    args = parser.parse_args(argv)
+
+    def report(name, result):
+        print(f"{name:48s} median {result['median_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+              f"peak {result['peak_kib']:10.1f} KiB")
+
+    resolutions = {name: RESOLUTIONS[name] for name in args.resolution} if args.resolution else None
+    results = run_benchmarks(args.filter, resolutions, args.repeat, report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare_to_baseline(results, baseline, args.max_regression)
+        for name, before, after in regressions:
+            print(f"GERİLEME {name}: {before:.3f} ms -> {after:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+import argparse
+import collections
+import csv
+import math
+import sys
+
+import numpy as np
+
+
+class RunningExtrema:
+    def __init__(self):
+        self.minima = collections.deque()
+        self.maxima = collections.deque()
+
+    def clear(self):
+        self.minima.clear()
+        self.maxima.clear()
+
+    def push(self, index, value):
+        while self.minima and self.minima[-1][1] >= value:
+            self.minima.pop()
+        self.minima.append((index, value))
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        self.maxima.append((index, value))
+
+    def evict(self, index):
+        if self.minima and self.minima[0][0] <= index:
+            self.minima.popleft()
+        if self.maxima and self.maxima[0][0] <= index:
+            self.maxima.popleft()
+
+    def min(self):
+        return self.minima[0][1]
+
+    def max(self):
+        return self.maxima[0][1]
+
+
+class _FixationRun:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.start = None
+        self.end = None
+        self.open = False
+
+    def add(self, timestamp, x, y):
+        if self.count == 0:
+            self.start = timestamp
+        self.count += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.end = timestamp
+
+    def remove(self, x, y, next_start):
+        self.count -= 1
+        self.sum_x -= x
+        self.sum_y -= y
+        self.start = next_start
+
+    def centroid(self):
+        return (self.sum_x / self.count, self.sum_y / self.count)
+
+    def start_event(self):
+        self.open = True
+        return {'type': 'fixation_start', 'timestamp': self.end, 'start': self.start,
+                'centroid': self.centroid()}
+
+    def end_event(self):
+        return {'type': 'fixation_end', 'timestamp': self.end, 'start': self.start, 'end': self.end,
+                'duration': self.end - self.start, 'centroid': self.centroid(), 'samples': self.count}
+
+
+def _valid(x, y):
+    return x is not None and y is not None and not (math.isnan(x) or math.isnan(y))
+
+
+class VelocityDetector:
+    def __init__(self, velocity_threshold=1000.0, min_duration=0.1, velocity_window=3, max_gap=0.1):
+        self.velocity_threshold = velocity_threshold
+        self.min_duration = min_duration
+        self.max_gap = max_gap
+        self.history = collections.deque(maxlen=velocity_window)
+        self.fixation = _FixationRun()
+        self.reset()
+
+    def reset(self):
+        self.history.clear()
+        self.fixation.clear()
+        self.saccade = None
+
+    def update(self, timestamp, x, y):
+        events = []
+        if not _valid(x, y):
+            return events
+        if self.history and timestamp - self.history[-1][0] > self.max_gap:
+            events.extend(self.flush())
+
+        previous = self.history[-1] if self.history else None
+        self.history.append((timestamp, x, y))
+        oldest_t, oldest_x, oldest_y = self.history[0]
+        dt = timestamp - oldest_t
+        velocity = math.hypot(x - oldest_x, y - oldest_y) / dt if dt > 0 else 0.0
+
+        if velocity < self.velocity_threshold:
+            if self.saccade:
+                events.append(self._saccade_end(timestamp, x, y))
+            self.fixation.add(timestamp, x, y)
+            if not self.fixation.open and self.fixation.end - self.fixation.start >= self.min_duration:
+                events.append(self.fixation.start_event())
+        else:
+            if self.fixation.open:
+                events.append(self.fixation.end_event())
+            self.fixation.clear()
+            if not self.saccade:
+                origin = previous or (timestamp, x, y)
+                self.saccade = {'start': origin[0], 'origin': origin[1:], 'peak_velocity': 0.0}
+                events.append({'type': 'saccade_start', 'timestamp': timestamp, 'start': origin[0]})
+            self.saccade['peak_velocity'] = max(self.saccade['peak_velocity'], velocity)
+        return events
+
+    def _saccade_end(self, timestamp, x, y):
+        saccade, self.saccade = self.saccade, None
+        origin_x, origin_y = saccade['origin']
+        return {'type': 'saccade_end', 'timestamp': timestamp, 'start': saccade['start'],
+                'end': timestamp, 'duration': timestamp - saccade['start'],
+                'amplitude': math.hypot(x - origin_x, y - origin_y),
+                'peak_velocity': saccade['peak_velocity']}
+
+    def flush(self):
+        events = [self.fixation.end_event()] if self.fixation.open else []
+        self.reset()
+        return events
+
+
+class DispersionDetector:
+    def __init__(self, dispersion_threshold=50.0, min_duration=0.1, max_gap=0.1):
+        self.dispersion_threshold = dispersion_threshold
+        self.min_duration = min_duration
+        self.max_gap = max_gap
+        self.window = collections.deque()
+        self.x_range = RunningExtrema()
+        self.y_range = RunningExtrema()
+        self.fixation = _FixationRun()
+        self.index = 0
+        self.reset()
+
+    def reset(self):
+        self.window.clear()
+        self.x_range.clear()
+        self.y_range.clear()
+        self.fixation.clear()
+        self.last_timestamp = None
+
+    def dispersion(self, x, y):
+        return (max(self.x_range.max(), x) - min(self.x_range.min(), x) +
+                max(self.y_range.max(), y) - min(self.y_range.min(), y))
+
+    def _pop_left(self):
+        index, _, x, y = self.window.popleft()
+        self.x_range.evict(index)
+        self.y_range.evict(index)
+        self.fixation.remove(x, y, self.window[0][1] if self.window else None)
+
+    def update(self, timestamp, x, y):
+        events = []
+        if not _valid(x, y):
+            return events
+        if self.last_timestamp is not None and timestamp - self.last_timestamp > self.max_gap:
+            events.extend(self.flush())
+        self.last_timestamp = timestamp
+
+        if self.window and self.dispersion(x, y) > self.dispersion_threshold:
+            if self.fixation.open:
+                events.append(self.fixation.end_event())
+                self.window.clear()
+                self.x_range.clear()
+                self.y_range.clear()
+                self.fixation.clear()
+            else:
+                while self.window and self.dispersion(x, y) > self.dispersion_threshold:
+                    self._pop_left()
+
+        self.window.append((self.index, timestamp, x, y))
+        self.x_range.push(self.index, x)
+        self.y_range.push(self.index, y)
+        self.fixation.add(timestamp, x, y)
+        self.index += 1
+
+        if not self.fixation.open and self.fixation.end - self.fixation.start >= self.min_duration:
+            events.append(self.fixation.start_event())
+        return events
+
+    def flush(self):
+        events = [self.fixation.end_event()] if self.fixation.open else []
+        self.reset()
+        return events
+
+
+EVENT_DETECTORS = {
+    'ivt': VelocityDetector,
+    'idt': DispersionDetector,
+}
+
+
+def make_detector(name, **kwargs):
+    return EVENT_DETECTORS[name](**kwargs)
+
+
+def detect_events(detector, timestamps, xs, ys):
+    events = []
+    for timestamp, x, y in zip(timestamps, xs, ys):
+        events.extend(detector.update(float(timestamp), float(x), float(y)))
+    events.extend(detector.flush())
+    return events
+
+
+def load_gaze(path, fps):
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        frames = np.array([float(row['frame']) for row in rows])
+        xs = np.array([float(row['gaze_x']) for row in rows])
+        ys = np.array([float(row['gaze_y']) for row in rows])
+    else:
+        from batch_processing import GAZE_RECORD_DTYPE
+        records = np.fromfile(path, dtype=GAZE_RECORD_DTYPE)
+        frames, xs, ys = records['frame'].astype(np.float64), records['gaze_x'], records['gaze_y']
+    return frames / fps, xs, ys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gaze çıktısından fixation/saccade olaylarını çıkarır")
+    parser.add_argument('gaze', help="batch_processing.py çıktısı (.csv veya ikili)")
+    parser.add_argument('--method', choices=sorted(EVENT_DETECTORS), default='idt')
+    parser.add_argument('--fps', type=float, default=30.0, help="Kare numarasını zamana çevirmek için")
+    parser.add_argument('--velocity-threshold', type=float, default=1000.0, help="I-VT eşiği (piksel/sn)")
+    parser.add_argument('--dispersion-threshold', type=float, default=50.0, help="I-DT eşiği (piksel)")
+    parser.add_argument('--min-duration', type=float, default=0.1)
+    parser.add_argument('--output', default=None, help="Fixation CSV dosyası (varsayılan: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.method == 'ivt':
+        detector = VelocityDetector(args.velocity_threshold, args.min_duration, max_gap=2.0 / args.fps)
+    else:
+        detector = DispersionDetector(args.dispersion_threshold, args.min_duration, max_gap=2.0 / args.fps)
+
+    fixations = [event for event in detect_events(detector, *load_gaze(args.gaze, args.fps))
+                 if event['type'] == 'fixation_end']
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    writer = csv.writer(output)
+    writer.writerow(['start', 'end', 'duration', 'x', 'y', 'samples'])
+    for event in fixations:
+        writer.writerow([event['start'], event['end'], event['duration'],
+                         event['centroid'][0], event['centroid'][1], event['samples']])
+    if args.output:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,31 @@
-import tkinter as tk
-from tkinter import messagebox
 import threading
 import time
 import math
+import json
+import concurrent.futures
 
+import numpy as np
 
-class ImageProcessing:
+from filters import make_filter
+from instrumentation import NULL_PROFILER, Profiler
+from morphology import BufferPool, Morphology
+from pipeline import TrackingPipeline
+
+
+CALIBRATION_FILE = 'calibration.json'
+GAZE_FILTER = 'kalman'
+
+tk = None
+messagebox = None
+
+
+def _import_tkinter():
+    global tk, messagebox
+    import tkinter as tk
+    from tkinter import messagebox
+
+
+class ReferenceImageProcessing:
     @staticmethod
     def rgb_to_gray(frame):
         height, width = len(frame), len(frame[0])
@@ -35,7 +55,7 @@ class ImageProcessing:
 
     @staticmethod
     def otsu_threshold(gray):
-        hist = ImageProcessing.compute_histogram(gray)
+        hist = ReferenceImageProcessing.compute_histogram(gray)
         total_pixels = sum(hist)
 
         sum_total = sum(i * hist[i] for i in range(256))
@@ -63,7 +83,7 @@ class ImageProcessing:
                 max_variance = variance
                 threshold = t
 
-        return ImageProcessing.manual_threshold(gray, threshold)
+        return ReferenceImageProcessing.manual_threshold(gray, threshold)
 
     @staticmethod
     def adaptive_threshold(gray, block_size=15, c=2):
@@ -90,15 +110,36 @@ class ImageProcessing:
 
         return binary
 
+    @staticmethod
+    def _clahe_tile_axis(length, tile_size):
+        n_tiles = (length + tile_size - 1) // tile_size
+        centers = [2 * t * tile_size + min(tile_size, length - t * tile_size) - 1
+                   for t in range(n_tiles)]
+
+        axis = []
+        for p in range(length):
+            pos = 2 * p
+            t0 = 0
+            while t0 + 1 < n_tiles and centers[t0 + 1] <= pos:
+                t0 += 1
+            t1 = min(t0 + 1, n_tiles - 1)
+            span = centers[t1] - centers[t0]
+            if span == 0 or pos <= centers[t0]:
+                axis.append((t0, t1, 0, 1))
+            else:
+                axis.append((t0, t1, pos - centers[t0], span))
+
+        return axis
+
     @staticmethod
     def clahe(gray, clip_limit=2.0, tile_size=8):
         height, width = len(gray), len(gray[0])
-        tiles_y = height // tile_size
-        tiles_x = width // tile_size
-
-        enhanced = [[gray[i][j] for j in range(width)] for i in range(height)]
+        tiles_y = (height + tile_size - 1) // tile_size
+        tiles_x = (width + tile_size - 1) // tile_size
 
+        luts = []
         for ty in range(tiles_y):
+            lut_row = []
             for tx in range(tiles_x):
                 y_start = ty * tile_size
                 y_end = min((ty + 1) * tile_size, height)
@@ -111,7 +152,7 @@ class ImageProcessing:
                         hist[gray[i][j]] += 1
 
                 total_pixels = (y_end - y_start) * (x_end - x_start)
-                clip_threshold = int(clip_limit * total_pixels / 256)
+                clip_threshold = max(1, int(clip_limit * total_pixels / 256))
 
                 excess = 0
                 for i in range(256):
@@ -128,10 +169,22 @@ class ImageProcessing:
                 for i in range(1, 256):
                     cdf[i] = cdf[i-1] + hist[i]
 
-                if cdf[255] > 0:
-                    for i in range(y_start, y_end):
-                        for j in range(x_start, x_end):
-                            enhanced[i][j] = int((cdf[gray[i][j]] / cdf[255]) * 255)
+                lut_row.append([(cdf[i] * 255 + cdf[255] // 2) // cdf[255] for i in range(256)])
+            luts.append(lut_row)
+
+        rows = ReferenceImageProcessing._clahe_tile_axis(height, tile_size)
+        cols = ReferenceImageProcessing._clahe_tile_axis(width, tile_size)
+
+        enhanced = [[0] * width for _ in range(height)]
+        for i in range(height):
+            ty0, ty1, ny, dy = rows[i]
+            for j in range(width):
+                tx0, tx1, nx, dx = cols[j]
+                v = gray[i][j]
+                top = luts[ty0][tx0][v] * (dx - nx) + luts[ty0][tx1][v] * nx
+                bottom = luts[ty1][tx0][v] * (dx - nx) + luts[ty1][tx1][v] * nx
+                denom = dx * dy
+                enhanced[i][j] = (top * (dy - ny) + bottom * ny + denom // 2) // denom
 
         return enhanced
 
@@ -141,12 +194,12 @@ class ImageProcessing:
         result = [[0] * width for _ in range(height)]
         half_k = kernel_size // 2
 
-        for i in range(half_k, height - half_k):
-            for j in range(half_k, width - half_k):
+        for i in range(height):
+            for j in range(width):
                 min_val = 255
-                for ki in range(-half_k, half_k + 1):
-                    for kj in range(-half_k, half_k + 1):
-                        min_val = min(min_val, binary[i + ki][j + kj])
+                for ii in range(max(0, i - half_k), min(height, i + half_k + 1)):
+                    for jj in range(max(0, j - half_k), min(width, j + half_k + 1)):
+                        min_val = min(min_val, binary[ii][jj])
                 result[i][j] = min_val
 
         return result
@@ -157,12 +210,12 @@ class ImageProcessing:
         result = [[0] * width for _ in range(height)]
         half_k = kernel_size // 2
 
-        for i in range(half_k, height - half_k):
-            for j in range(half_k, width - half_k):
+        for i in range(height):
+            for j in range(width):
                 max_val = 0
-                for ki in range(-half_k, half_k + 1):
-                    for kj in range(-half_k, half_k + 1):
-                        max_val = max(max_val, binary[i + ki][j + kj])
+                for ii in range(max(0, i - half_k), min(height, i + half_k + 1)):
+                    for jj in range(max(0, j - half_k), min(width, j + half_k + 1)):
+                        max_val = max(max_val, binary[ii][jj])
                 result[i][j] = max_val
 
         return result
@@ -255,75 +308,983 @@ class ImageProcessing:
         return cropped if cropped and cropped[0] else [[128]]
 
 
+def _as_image(image):
+    return np.asarray(image, dtype=np.uint8)
+
+
+class ImageProcessing:
+    @staticmethod
+    def rgb_to_gray(frame):
+        frame = np.asarray(frame, dtype=np.float64)
+        gray = 0.299 * frame[..., 0] + 0.587 * frame[..., 1] + 0.114 * frame[..., 2]
+        return gray.astype(np.uint8)
+
+    @staticmethod
+    def manual_threshold(gray, threshold=50):
+        gray = _as_image(gray)
+        return np.where(gray < threshold, 255, 0).astype(np.uint8)
+
+    @staticmethod
+    def compute_histogram(gray):
+        return np.bincount(_as_image(gray).ravel(), minlength=256)
+
+    @staticmethod
+    def otsu_threshold(gray):
+        gray = _as_image(gray)
+        threshold = ImageProcessing.otsu_level(ImageProcessing.compute_histogram(gray))
+        return ImageProcessing.manual_threshold(gray, threshold)
+
+    @staticmethod
+    def otsu_level(hist):
+        hist = np.asarray(hist, dtype=np.int64)
+        weight_background = np.cumsum(hist)
+        weight_foreground = weight_background[-1] - weight_background
+        sum_background = np.cumsum(np.arange(256, dtype=np.int64) * hist)
+        sum_total = sum_background[-1]
+
+        valid = (weight_background > 0) & (weight_foreground > 0)
+        variance = np.zeros(256)
+        wb = weight_background[valid]
+        wf = weight_foreground[valid]
+        mean_background = sum_background[valid] / wb
+        mean_foreground = (sum_total - sum_background[valid]) / wf
+        variance[valid] = (wb * wf) * (mean_background - mean_foreground) ** 2
+
+        return int(np.argmax(variance)) if variance.max() > 0 else 0
+
+    @staticmethod
+    def integral_image(gray):
+        gray = _as_image(gray)
+        integral = np.zeros((gray.shape[0] + 1, gray.shape[1] + 1), dtype=np.int64)
+        np.cumsum(gray, axis=0, dtype=np.int64, out=integral[1:, 1:])
+        np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+        return integral
+
+    @staticmethod
+    def adaptive_threshold(gray, block_size=15, c=2):
+        gray = _as_image(gray)
+        height, width = gray.shape
+        half_block = block_size // 2
+
+        i_start = np.maximum(0, np.arange(height) - half_block)
+        i_end = np.minimum(height, np.arange(height) + half_block + 1)
+        j_start = np.maximum(0, np.arange(width) - half_block)
+        j_end = np.minimum(width, np.arange(width) + half_block + 1)
+
+        integral = ImageProcessing.integral_image(gray)
+        local_sum = (integral[np.ix_(i_end, j_end)] - integral[np.ix_(i_start, j_end)]
+                     - integral[np.ix_(i_end, j_start)] + integral[np.ix_(i_start, j_start)])
+        count = (i_end - i_start)[:, None] * (j_end - j_start)[None, :]
+
+        local_mean = local_sum / count
+        return np.where(gray < (local_mean - c), 255, 0).astype(np.uint8)
+
+    @staticmethod
+    def _clahe_tile_axis(length, tile_size):
+        n_tiles = (length + tile_size - 1) // tile_size
+        starts = np.arange(n_tiles) * tile_size
+        centers = 2 * starts + np.minimum(tile_size, length - starts) - 1
+
+        pos = 2 * np.arange(length)
+        t0 = np.clip(np.searchsorted(centers, pos, side='right') - 1, 0, n_tiles - 1)
+        t1 = np.minimum(t0 + 1, n_tiles - 1)
+        span = centers[t1] - centers[t0]
+        num = np.where(span > 0, np.maximum(pos - centers[t0], 0), 0)
+        span = np.where(span > 0, span, 1)
+
+        return t0, t1, num, span
+
+    @staticmethod
+    def clahe_tile_luts(gray, clip_limit=2.0, tile_size=8):
+        gray = _as_image(gray)
+        height, width = gray.shape
+        tiles_y = (height + tile_size - 1) // tile_size
+        tiles_x = (width + tile_size - 1) // tile_size
+        n_tiles = tiles_y * tiles_x
+
+        padded = np.full((tiles_y * tile_size, tiles_x * tile_size), 256, dtype=np.int64)
+        padded[:height, :width] = gray
+        tiles = padded.reshape(tiles_y, tile_size, tiles_x, tile_size)
+        tiles = tiles.transpose(0, 2, 1, 3).reshape(n_tiles, tile_size * tile_size)
+
+        offsets = np.arange(n_tiles)[:, None] * 257
+        hist = np.bincount((tiles + offsets).ravel(), minlength=n_tiles * 257)
+        hist = hist.reshape(n_tiles, 257)[:, :256]
+
+        lut = ImageProcessing.clahe_luts(hist, clip_limit)
+        return lut.astype(np.uint8).reshape(tiles_y, tiles_x, 256)
+
+    @staticmethod
+    def clahe_luts(hist, clip_limit=2.0, out=None):
+        hist = np.asarray(hist, dtype=np.int64)
+        if out is None:
+            out = np.empty_like(hist)
+
+        total_pixels = hist.sum(axis=1, keepdims=True)
+        clip_threshold = np.maximum(1, (clip_limit * total_pixels / 256).astype(np.int64))
+        np.subtract(hist, clip_threshold, out=out)
+        np.maximum(out, 0, out=out)
+        excess = out.sum(axis=1, keepdims=True)
+        np.minimum(hist, clip_threshold, out=out)
+        out += excess // 256
+
+        np.cumsum(out, axis=1, out=out)
+        cdf_max = out[:, 255:].copy()
+        out *= 255
+        out += cdf_max // 2
+        out //= cdf_max
+        return out
+
+    @staticmethod
+    def apply_tile_luts(gray, luts, tile_size=8):
+        gray = _as_image(gray)
+        height, width = gray.shape
+        tiles_x = luts.shape[1]
+
+        ty0, ty1, ny, dy = ImageProcessing._clahe_tile_axis(height, tile_size)
+        tx0, tx1, nx, dx = ImageProcessing._clahe_tile_axis(width, tile_size)
+
+        rows = np.stack([ty0, ty0, ty1, ty1])[:, :, None] * tiles_x
+        cols = np.stack([tx0, tx1, tx0, tx1])[:, None, :]
+        index = (rows + cols) * 256 + gray
+        values = luts.reshape(-1)[index].astype(np.int64)
+
+        wx0 = (dx - nx)[None, :]
+        wx1 = nx[None, :]
+        top = values[0] * wx0 + values[1] * wx1
+        bottom = values[2] * wx0 + values[3] * wx1
+        denom = (dy[:, None] * dx[None, :])
+        enhanced = (top * (dy - ny)[:, None] + bottom * ny[:, None] + denom // 2) // denom
+
+        return enhanced.astype(np.uint8)
+
+    @staticmethod
+    def clahe(gray, clip_limit=2.0, tile_size=8):
+        gray = _as_image(gray)
+        luts = ImageProcessing.clahe_tile_luts(gray, clip_limit, tile_size)
+        return ImageProcessing.apply_tile_luts(gray, luts, tile_size)
+
+    @staticmethod
+    def erode(binary, kernel_size=3):
+        return Morphology().erode(binary, kernel_size)
+
+    @staticmethod
+    def dilate(binary, kernel_size=3):
+        return Morphology().dilate(binary, kernel_size)
+
+    @staticmethod
+    def sobel_edges(gray):
+        gray = _as_image(gray)
+        height, width = gray.shape
+        return ImageProcessing.sobel_edges_region(gray, 0, height, 0, width)
+
+    @staticmethod
+    def sobel_edges_region(gray, y0, y1, x0, x1):
+        gray = _as_image(gray)
+        height, width = gray.shape
+        edges = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+
+        iy0, iy1 = max(y0, 1), min(y1, height - 1)
+        ix0, ix1 = max(x0, 1), min(x1, width - 1)
+        if iy0 >= iy1 or ix0 >= ix1:
+            return edges
+
+        g = gray[iy0 - 1:iy1 + 1, ix0 - 1:ix1 + 1].astype(np.int32)
+        gx = (g[:-2, 2:] + 2 * g[1:-1, 2:] + g[2:, 2:]) - (g[:-2, :-2] + 2 * g[1:-1, :-2] + g[2:, :-2])
+        gy = (g[2:, :-2] + 2 * g[2:, 1:-1] + g[2:, 2:]) - (g[:-2, :-2] + 2 * g[:-2, 1:-1] + g[:-2, 2:])
+
+        magnitude = np.sqrt((gx * gx + gy * gy).astype(np.float64))
+        edges[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0] = np.minimum(magnitude, 255).astype(np.uint8)
+
+        return edges
+
+    @staticmethod
+    def find_contours(binary):
+        return ReferenceImageProcessing.find_contours(_as_image(binary).tolist())
+
+    @staticmethod
+    def find_runs(binary):
+        binary = _as_image(binary)
+        height, width = binary.shape
+        padded = np.zeros((height, width + 2), dtype=np.int8)
+        padded[:, 1:-1] = binary != 0
+        steps = np.diff(padded, axis=1)
+
+        rows, starts = np.nonzero(steps == 1)
+        _, ends = np.nonzero(steps == -1)
+        return rows, starts, ends
+
+    @staticmethod
+    def label_components(binary, min_area=50, gray=None):
+        binary = _as_image(binary)
+        width = binary.shape[1]
+        rows, starts, ends = ImageProcessing.find_runs(binary)
+        n_runs = len(rows)
+
+        if n_runs == 0:
+            return []
+
+        stride = width + 1
+        start_keys = rows * stride + starts
+        end_keys = rows * stride + ends
+
+        below = rows > 0
+        lo = np.searchsorted(end_keys, (rows - 1) * stride + starts, side='right')
+        hi = np.searchsorted(start_keys, (rows - 1) * stride + ends, side='left')
+        counts = np.where(below, np.maximum(hi - lo, 0), 0)
+
+        run_b = np.repeat(np.arange(n_runs), counts)
+        run_a = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+        parent = list(range(n_runs))
+
+        def find(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+
+        for a, b in zip(run_a.tolist(), run_b.tolist()):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        roots = np.array([find(i) for i in range(n_runs)])
+        _, labels = np.unique(roots, return_inverse=True)
+        n_labels = labels.max() + 1
+
+        lengths = (ends - starts).astype(np.float64)
+        x_sums = lengths * (starts + ends - 1) / 2
+        last = ends - 1.0
+        before = starts - 1.0
+        xx_sums = (last * (last + 1) * (2 * last + 1) - before * (before + 1) * (2 * before + 1)) / 6
+
+        area = np.bincount(labels, lengths, n_labels)
+        sum_x = np.bincount(labels, x_sums, n_labels)
+        sum_y = np.bincount(labels, lengths * rows, n_labels)
+        sum_xx = np.bincount(labels, xx_sums, n_labels)
+        sum_yy = np.bincount(labels, lengths * rows * rows, n_labels)
+        sum_xy = np.bincount(labels, x_sums * rows, n_labels)
+
+        x_min = np.full(n_labels, width)
+        x_max = np.full(n_labels, -1)
+        y_min = np.full(n_labels, binary.shape[0])
+        y_max = np.full(n_labels, -1)
+        np.minimum.at(x_min, labels, starts)
+        np.maximum.at(x_max, labels, ends - 1)
+        np.minimum.at(y_min, labels, rows)
+        np.maximum.at(y_max, labels, rows)
+
+        intensity = None
+        if gray is not None:
+            row_sums = np.zeros((binary.shape[0], width + 1), dtype=np.int64)
+            np.cumsum(_as_image(gray), axis=1, dtype=np.int64, out=row_sums[:, 1:])
+            run_sums = row_sums[rows, ends] - row_sums[rows, starts]
+            intensity = np.bincount(labels, run_sums, n_labels) / area
+
+        blobs = []
+        for k in np.nonzero(area > min_area)[0]:
+            n = area[k]
+            cx = float(sum_x[k] / n)
+            cy = float(sum_y[k] / n)
+            blobs.append({
+                'area': int(n),
+                'bbox': (int(x_min[k]), int(y_min[k]),
+                         int(x_max[k] - x_min[k] + 1), int(y_max[k] - y_min[k] + 1)),
+                'centroid': (cx, cy),
+                # central second-order moments divided by area
+                'mu20': float(sum_xx[k] / n - cx * cx),
+                'mu11': float(sum_xy[k] / n - cx * cy),
+                'mu02': float(sum_yy[k] / n - cy * cy)
+            })
+            if intensity is not None:
+                blobs[-1]['mean_intensity'] = float(intensity[k])
+
+        return blobs
+
+    @staticmethod
+    def fit_ellipse(points):
+        return ReferenceImageProcessing.fit_ellipse(points)
+
+    @staticmethod
+    def fit_ellipse_moments(blob):
+        mu20, mu11, mu02 = blob['mu20'], blob['mu11'], blob['mu02']
+        mean = (mu20 + mu02) / 2
+        spread = math.sqrt(((mu20 - mu02) / 2) ** 2 + mu11 ** 2)
+        major = 2 * math.sqrt(max(mean + spread, 0.0))
+        minor = 2 * math.sqrt(max(mean - spread, 0.0))
+
+        return {
+            'center': blob['centroid'],
+            'axes': (major, minor),
+            'angle': 0.5 * math.atan2(2 * mu11, mu20 - mu02)
+        }
+
+    @staticmethod
+    def downsample(gray):
+        gray = _as_image(gray)
+        height, width = gray.shape[0] // 2 * 2, gray.shape[1] // 2 * 2
+        pixels = gray[:height, :width].astype(np.uint16)
+        total = pixels[0::2, 0::2] + pixels[1::2, 0::2] + pixels[0::2, 1::2] + pixels[1::2, 1::2]
+        return ((total + 2) >> 2).astype(np.uint8)
+
+    @staticmethod
+    def build_pyramid(gray, levels):
+        pyramid = [_as_image(gray)]
+        while len(pyramid) < levels and min(pyramid[-1].shape) >= 2:
+            pyramid.append(ImageProcessing.downsample(pyramid[-1]))
+        return pyramid
+
+    @staticmethod
+    def crop_eye_region(gray, x, y, w, h):
+        gray = _as_image(gray)
+        height, width = gray.shape
+        x1 = max(0, int(x))
+        y1 = max(0, int(y))
+        x2 = min(width, int(x + w))
+        y2 = min(height, int(y + h))
+
+        if x2 <= x1 or y2 <= y1:
+            return np.full((1, 1), 128, dtype=np.uint8)
+        return gray[y1:y2, x1:x2]
+
+
+class HistogramCache(BufferPool):
+    # Tiles sit on a lattice aligned to the frame origin, so any region whose
+    # corner is a multiple of tile_size reuses the tiles it shares with earlier ones.
+    def __init__(self, tile_size=8, clip_limit=2.0, tolerance=2.0):
+        super().__init__()
+        self.tile_size = tile_size
+        self.clip_limit = clip_limit
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self.reset()
+
+    def reset(self):
+        self.frame_shape = None
+        self.region = None
+        self.tiles = 0
+        self.changed = 0
+        self.otsu = None
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _tiles(self, image):
+        size = self.tile_size
+        height, width = image.shape
+        return image.reshape(height // size, size, width // size, size).swapaxes(1, 2)
+
+    def _allocate(self, frame_shape):
+        size = self.tile_size
+        height, width = self.frame_shape = frame_shape
+        tiles_y, tiles_x = -(-height // size), -(-width // size)
+
+        # padding holds 256 in both frame and reference, so it never counts as change
+        self.reference = np.full((tiles_y * size, tiles_x * size), 256, dtype=np.int16)
+        self.histograms = np.zeros((tiles_y, tiles_x, 256), dtype=np.int32)
+        self.luts = np.zeros((tiles_y, tiles_x, 256), dtype=np.int32)
+        self.seen = np.zeros((tiles_y, tiles_x), dtype=bool)
+        rows = np.minimum(size, height - np.arange(tiles_y) * size)
+        cols = np.minimum(size, width - np.arange(tiles_x) * size)
+        self.tile_pixels = rows[:, None] * cols[None, :]
+
+    def update(self, gray, y=0, x=0, frame_shape=None):
+        gray = _as_image(gray)
+        height, width = gray.shape
+        size = self.tile_size
+        if y % size or x % size:
+            raise ValueError("Bölge köşesi karo ızgarasına hizalı olmalı")
+
+        frame_shape = tuple(frame_shape or gray.shape)
+        if frame_shape != self.frame_shape:
+            self._allocate(frame_shape)
+
+        ty0, tx0 = y // size, x // size
+        ty1, tx1 = ty0 - (-height // size), tx0 - (-width // size)
+        region = (ty0, ty1, tx0, tx1)
+        if region != self.region:
+            self.region = region
+            self.otsu = None
+
+        padded_shape = ((ty1 - ty0) * size, (tx1 - tx0) * size)
+        frame = self.buffer('frame', padded_shape, np.int16)
+        frame[:height, :width] = gray
+        frame[height:] = 256
+        frame[:, width:] = 256
+        reference = self.reference[y:y + padded_shape[0], x:x + padded_shape[1]]
+
+        diff = self.buffer('diff', padded_shape, np.int16)
+        np.subtract(frame, reference, out=diff)
+        np.abs(diff, out=diff)
+        # mean absolute difference per tile, compared without dividing
+        changed = self._tiles(diff).sum(axis=(2, 3)) > self.tolerance * self.tile_pixels[ty0:ty1, tx0:tx1]
+        changed |= ~self.seen[ty0:ty1, tx0:tx1]
+
+        rows, cols = np.nonzero(changed)
+        self.tiles = changed.size
+        self.changed = len(rows)
+        self.misses += self.changed
+        self.hits += self.tiles - self.changed
+        if not self.changed:
+            return self.changed
+
+        blocks = self._tiles(frame)[rows, cols]
+        self._tiles(reference)[rows, cols] = blocks
+        keys = blocks.reshape(self.changed, -1) + np.arange(self.changed)[:, None] * 257
+        hist = np.bincount(keys.ravel(), minlength=self.changed * 257).reshape(self.changed, 257)[:, :256]
+
+        rows += ty0
+        cols += tx0
+        self.histograms[rows, cols] = hist
+        self.luts[rows, cols] = ImageProcessing.clahe_luts(hist, self.clip_limit)
+        self.seen[rows, cols] = True
+        self.otsu = None
+        return self.changed
+
+    def histogram(self):
+        ty0, ty1, tx0, tx1 = self.region
+        return self.histograms[ty0:ty1, tx0:tx1].sum(axis=(0, 1))
+
+    def otsu_level(self):
+        if self.otsu is None:
+            self.otsu = ImageProcessing.otsu_level(self.histogram())
+        return self.otsu
+
+    def clahe_luts(self):
+        ty0, ty1, tx0, tx1 = self.region
+        return self.luts[ty0:ty1, tx0:tx1]
+
+
+class FramePreprocessor(BufferPool):
+    # Returned arrays live in the pool and are overwritten by the next call.
+    def __init__(self, morphology=None, clip_limit=2.0, tile_size=8, max_layouts=64,
+                 histogram_tolerance=None, max_histograms=4):
+        super().__init__()
+        self.morphology = morphology or Morphology()
+        self.clip_limit = clip_limit
+        self.tile_size = tile_size
+        self.max_layouts = max_layouts
+        self.layouts = {}
+        self.histogram_tolerance = histogram_tolerance
+        self.max_histograms = max_histograms
+        self.histograms = {}
+
+    def histogram_cache(self, image):
+        if self.histogram_tolerance is None:
+            return None
+        key = (image.ndim,) + image.shape[:2]
+        cache = self.histograms.pop(key, None)
+        if cache is None:
+            if len(self.histograms) >= self.max_histograms:
+                del self.histograms[next(iter(self.histograms))]
+            cache = HistogramCache(self.tile_size, self.clip_limit, self.histogram_tolerance)
+        self.histograms[key] = cache
+        return cache
+
+    def histogram_hit_rate(self):
+        hits = sum(cache.hits for cache in self.histograms.values())
+        total = hits + sum(cache.misses for cache in self.histograms.values())
+        return hits / total if total else 0.0
+
+    def _layout(self, height, width, block_size):
+        key = (height, width, block_size)
+        layout = self.layouts.get(key)
+        if layout is not None:
+            return layout
+        if len(self.layouts) >= self.max_layouts:
+            self.layouts.clear()
+
+        tile_size = self.tile_size
+        tiles_x = (width + tile_size - 1) // tile_size
+        tiles_y = (height + tile_size - 1) // tile_size
+        ty0, ty1, ny, dy = ImageProcessing._clahe_tile_axis(height, tile_size)
+        tx0, tx1, nx, dx = ImageProcessing._clahe_tile_axis(width, tile_size)
+
+        # index tables are intp so take/bincount use them without a converted copy
+        def rows(values, dtype=np.int32):
+            return values.astype(dtype)[:, None]
+
+        def cols(values, dtype=np.int32):
+            return values.astype(dtype)[None, :]
+
+        half_block = block_size // 2
+        i_start = np.maximum(0, np.arange(height) - half_block)
+        i_end = np.minimum(height, np.arange(height) + half_block + 1)
+        j_start = np.maximum(0, np.arange(width) - half_block)
+        j_end = np.minimum(width, np.arange(width) + half_block + 1)
+
+        layout = self.layouts[key] = {
+            'tiles': tiles_y * tiles_x,
+            'tile_rows': rows(np.arange(height) // tile_size * tiles_x * 256, np.intp),
+            'tile_cols': cols(np.arange(width) // tile_size * 256, np.intp),
+            'corners': [
+                (rows(ty0 * tiles_x * 256, np.intp), cols(tx0 * 256, np.intp), rows(dy - ny), cols(dx - nx)),
+                (rows(ty0 * tiles_x * 256, np.intp), cols(tx1 * 256, np.intp), rows(dy - ny), cols(nx)),
+                (rows(ty1 * tiles_x * 256, np.intp), cols(tx0 * 256, np.intp), rows(ny), cols(dx - nx)),
+                (rows(ty1 * tiles_x * 256, np.intp), cols(tx1 * 256, np.intp), rows(ny), cols(nx)),
+            ],
+            'span_rows': rows(dy),
+            'span_cols': cols(dx),
+            'i_start': i_start,
+            'i_end': i_end,
+            'j_start': j_start,
+            'j_end': j_end,
+            'count_rows': (i_end - i_start)[:, None],
+            'count_cols': (j_end - j_start)[None, :]
+        }
+        return layout
+
+    def gray_region(self, frame, x1, y1, x2, y2):
+        region = frame[y1:y2, x1:x2]
+        if region.ndim == 2:
+            return _as_image(region)
+
+        # same float64 operation order as rgb_to_gray, so the result is bit-identical
+        shape = region.shape[:2]
+        total = self.buffer('gray_total', shape, np.float64)
+        term = self.buffer('gray_term', shape, np.float64)
+        np.multiply(region[..., 0], 0.299, out=total)
+        np.multiply(region[..., 1], 0.587, out=term)
+        total += term
+        np.multiply(region[..., 2], 0.114, out=term)
+        total += term
+
+        gray = self.buffer('gray', shape)
+        np.copyto(gray, total, casting='unsafe')
+        return gray
+
+    def enhance(self, gray, block_size=11, cache=None, y=0, x=0, frame_shape=None):
+        shape = gray.shape
+        layout = self._layout(shape[0], shape[1], block_size)
+        n_tiles = layout['tiles']
+
+        index = self.buffer('lut_index', shape, np.intp)
+        if cache is not None:
+            cache.update(gray, y, x, frame_shape)
+            luts = cache.clahe_luts()
+        else:
+            np.add(layout['tile_rows'], layout['tile_cols'], out=index)
+            index += gray
+            hist = self.buffer('tile_hist', (n_tiles, 256), np.int64)
+            hist.fill(0)
+            np.add.at(hist.reshape(-1), index.ravel(), 1)
+            luts = ImageProcessing.clahe_luts(hist, self.clip_limit,
+                                              out=self.buffer('luts', hist.shape, np.int64))
+        table = self.buffer('lut_table', luts.shape, np.int32)
+        np.copyto(table, luts, casting='unsafe')
+        table = table.ravel()
+
+        # bilinear blend of the four neighbouring tile LUTs, as in apply_tile_luts
+        values = self.buffer('lut_values', shape, np.int32)
+        enhanced = self.buffer('enhanced', shape, np.int32)
+        for k, (row_base, col_base, row_weight, col_weight) in enumerate(layout['corners']):
+            np.add(row_base, col_base, out=index)
+            index += gray
+            np.take(table, index, out=values, mode='clip')
+            values *= row_weight
+            values *= col_weight
+            if k == 0:
+                np.copyto(enhanced, values)
+            else:
+                enhanced += values
+
+        denom = self.buffer('lut_denom', shape, np.int32)
+        np.multiply(layout['span_rows'], layout['span_cols'], out=denom)
+        np.floor_divide(denom, 2, out=values)
+        enhanced += values
+        enhanced //= denom
+        return enhanced
+
+    def threshold(self, enhanced, block_size=11, c=5):
+        height, width = shape = enhanced.shape
+        layout = self._layout(height, width, block_size)
+
+        integral = self.buffer('integral', (height + 1, width + 1), np.int64)
+        integral[0] = 0
+        integral[:, 0] = 0
+        np.copyto(integral[1:, 1:], enhanced)
+        np.cumsum(integral[1:, 1:], axis=0, out=integral[1:, 1:])
+        np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+
+        band = self.buffer('band_sum', (height, width + 1), np.int64)
+        band_start = self.buffer('band_start', (height, width + 1), np.int64)
+        np.take(integral, layout['i_end'], axis=0, out=band, mode='clip')
+        np.take(integral, layout['i_start'], axis=0, out=band_start, mode='clip')
+        band -= band_start
+
+        local_sum = self.buffer('local_sum', shape, np.int64)
+        scratch = self.buffer('local_scratch', shape, np.int64)
+        np.take(band, layout['j_end'], axis=1, out=local_sum, mode='clip')
+        np.take(band, layout['j_start'], axis=1, out=scratch, mode='clip')
+        local_sum -= scratch
+
+        # gray < sum / count - c, without the division
+        count = scratch
+        np.multiply(layout['count_rows'], layout['count_cols'], out=count)
+        limit = self.buffer('limit', shape, np.float64)
+        np.multiply(count, c, out=limit)
+        np.subtract(local_sum, limit, out=limit)
+        np.multiply(enhanced, count, out=count)
+
+        mask = self.buffer('mask', shape, np.bool_)
+        np.less(count, limit, out=mask)
+        binary = self.buffer('binary', shape)
+        np.multiply(mask.view(np.uint8), 255, out=binary)
+        return binary
+
+
+class LazyEdgeMap:
+    def __init__(self, gray, cache=True, to_gray=None):
+        # with `to_gray`, `gray` is the colour frame and only the strips asked for are converted
+        self.to_gray = to_gray
+        self.gray = np.asarray(gray) if to_gray else _as_image(gray)
+        self.shape = self.gray.shape[:2]
+        self.cache = cache
+        self.rows = {}
+        self.computed_pixels = 0
+
+    def row_segment(self, y, x0, x1):
+        return self.strip(y, y + 1, x0, x1)[0]
+
+    def strip(self, y0, y1, x0, x1):
+        cached = [self.rows.get(y) for y in range(y0, y1)]
+        if all(c is not None and c[0] <= x0 and x1 <= c[1] for c in cached):
+            return np.stack([c[2][x0 - c[0]:x1 - c[0]] for c in cached])
+
+        if self.to_gray is None:
+            edges = ImageProcessing.sobel_edges_region(self.gray, y0, y1, x0, x1)
+        else:
+            # one pixel of context, so only the real image border stays zero
+            top, left = max(y0 - 1, 0), max(x0 - 1, 0)
+            patch = self.to_gray(self.gray[top:y1 + 1, left:x1 + 1])
+            edges = ImageProcessing.sobel_edges_region(patch, y0 - top, y1 - top, x0 - left, x1 - left)
+        self.computed_pixels += edges.size
+        if self.cache:
+            for y in range(y0, y1):
+                self.rows[y] = (x0, x1, edges[y - y0])
+
+        return edges
+
+
 class PupilDetector:
     @staticmethod
     def detect_pupil(frame):
-        if not frame or not frame[0]:
+        pupil = PupilDetector.detect(frame)
+        if pupil is None:
             return None, None
 
-        gray = ImageProcessing.rgb_to_gray(frame)
+        return pupil['center'], pupil['corners']
 
-        height, width = len(gray), len(gray[0])
-        eye_y = height // 3
-        eye_h = height // 2
-        eye_region = ImageProcessing.crop_eye_region(gray, 0, eye_y, width, eye_h)
+    @staticmethod
+    def detect(frame, profiler=NULL_PROFILER, pyramid_levels=1, refine_window=3.0, preprocessor=None):
+        if frame is None or len(frame) == 0 or len(frame[0]) == 0:
+            return None
 
-        if not eye_region or not eye_region[0]:
-            return None, None
+        frame = np.asarray(frame)
+        height, width = frame.shape[:2]
+        eye_x, eye_y, eye_w, eye_h = PupilDetector.eye_band(width, height)
+        pupil = PupilDetector.find_pupil_pyramid(frame, eye_x, eye_y, eye_w, eye_h, pyramid_levels,
+                                                 refine_window, profiler=profiler,
+                                                 preprocessor=preprocessor)
 
-        enhanced = ImageProcessing.clahe(eye_region)
-        binary = ImageProcessing.adaptive_threshold(enhanced, block_size=11, c=5)
-        binary = ImageProcessing.erode(binary, 3)
-        binary = ImageProcessing.dilate(binary, 3)
+        if pupil is None:
+            profiler.count('pupil_lost')
+            return None
 
-        contours = ImageProcessing.find_contours(binary)
+        px, py = pupil['center']
+        with profiler.stage('corners'):
+            edges = LazyEdgeMap(frame, to_gray=ImageProcessing.rgb_to_gray)
+            pupil['corners'] = PupilDetector.find_eye_corners(edges, px, py)
 
-        if not contours:
-            return None, None
+        return pupil
 
-        largest_contour = max(contours, key=len)
-        pupil_center = ImageProcessing.fit_ellipse(largest_contour)
+    @staticmethod
+    def eye_band(width, height):
+        return 0, height // 3, width, height // 2
 
-        if pupil_center:
-            px, py = pupil_center
-            py += eye_y
+    @staticmethod
+    def find_pupil_pyramid(image, x, y, w, h, levels=3, refine_window=3.0, min_window=32,
+                           morphology=None, profiler=NULL_PROFILER, preprocessor=None):
+        preprocessor = preprocessor or FramePreprocessor(morphology)
+        if levels <= 1:
+            return PupilDetector.find_pupil_in_region(image, x, y, w, h, profiler=profiler,
+                                                      preprocessor=preprocessor)
+
+        image = np.asarray(image)
+        height, width = image.shape[:2]
+        x1 = max(0, int(x))
+        y1 = max(0, int(y))
+        x2 = min(width, int(x + w))
+        y2 = min(height, int(y + h))
 
-            edges = ImageProcessing.sobel_edges(gray)
-            left_corner, right_corner = PupilDetector.find_eye_corners(edges, px, py)
+        with profiler.stage('gray'):
+            band = preprocessor.gray_region(image, x1, y1, x2, y2)
+        with profiler.stage('pyramid'):
+            pyramid = ImageProcessing.build_pyramid(band, levels)
+        coarse_image = pyramid[-1]
+        scale = 2 ** (len(pyramid) - 1)
+
+        coarse = PupilDetector.find_pupil_in_region(coarse_image, 0, 0, coarse_image.shape[1],
+                                                    coarse_image.shape[0], profiler=profiler,
+                                                    min_area=max(4, 50 // (scale * scale)),
+                                                    preprocessor=preprocessor)
+        if coarse is None:
+            return None
 
-            return (px, py), (left_corner, right_corner)
+        cx, cy = coarse['center']
+        cx = x1 + (cx + 0.5) * scale - 0.5
+        cy = y1 + (cy + 0.5) * scale - 0.5
+        half = max(min_window / 2, refine_window * coarse['radius'] * scale)
 
-        return None, None
+        pupil = PupilDetector.find_pupil_in_region(image, cx - half, cy - half, 2 * half, 2 * half,
+                                                   profiler=profiler, preprocessor=preprocessor)
+        if pupil is None or pupil['touches_border']:
+            profiler.count('pyramid_fallbacks')
+            return PupilDetector.find_pupil_in_region(image, x, y, w, h, profiler=profiler,
+                                                      preprocessor=preprocessor)
+        return pupil
 
     @staticmethod
-    def find_eye_corners(edges, pupil_x, pupil_y):
-        height, width = len(edges), len(edges[0])
+    def find_pupil_in_region(image, x, y, w, h, morphology=None, profiler=NULL_PROFILER,
+                             min_area=50, block_size=11, preprocessor=None):
+        preprocessor = preprocessor or FramePreprocessor(morphology)
+        image = np.asarray(image)
+        height, width = image.shape[:2]
+        x1 = max(0, int(x))
+        y1 = max(0, int(y))
+        x2 = min(width, int(x + w))
+        y2 = min(height, int(y + h))
+
+        cache = preprocessor.histogram_cache(image)
+        if cache is not None:
+            # snap to the frame's tile lattice so successive windows share cached tiles
+            size = preprocessor.tile_size
+            x1, y1 = x1 // size * size, y1 // size * size
+            x2, y2 = min(width, -(-x2 // size) * size), min(height, -(-y2 // size) * size)
+
+        if x2 <= x1 or y2 <= y1:
+            return None
+
+        with profiler.stage('gray'):
+            eye_region = preprocessor.gray_region(image, x1, y1, x2, y2)
+        with profiler.stage('clahe'):
+            enhanced = preprocessor.enhance(eye_region, block_size, cache, y1, x1, (height, width))
+        if cache is not None:
+            profiler.count('histogram_hits', cache.tiles - cache.changed)
+            profiler.count('histogram_misses', cache.changed)
+        with profiler.stage('threshold'):
+            binary = preprocessor.threshold(enhanced, block_size, c=5)
+        with profiler.stage('morphology'):
+            binary = preprocessor.morphology.open(binary, 3, out=binary)
+        with profiler.stage('contours'):
+            blobs = ImageProcessing.label_components(binary, min_area=min_area, gray=eye_region)
+        profiler.count('contour_count', len(blobs))
+
+        if not blobs:
+            return None
+
+        with profiler.stage('ellipse'):
+            region_mean = float(eye_region.mean())
+            scored = [(PupilDetector.score_candidate(blob, region_mean), blob) for blob in blobs]
+            (confidence, ellipse), pupil = max(scored, key=lambda item: item[0][0])
+
+        cx, cy = ellipse['center']
+        ellipse['center'] = (cx + x1, cy + y1)
+        box_x, box_y, box_w, box_h = pupil['bbox']
+        region_h, region_w = eye_region.shape
+        touches_border = (box_x == 0 or box_y == 0 or
+                          box_x + box_w == region_w or box_y + box_h == region_h)
+
+        return {
+            'center': ellipse['center'],
+            'area': pupil['area'],
+            'radius': math.sqrt(ellipse['axes'][0] * ellipse['axes'][1]),
+            'ellipse': ellipse,
+            'confidence': confidence,
+            'touches_border': touches_border
+        }
+
+    @staticmethod
+    def score_candidate(blob, region_mean):
+        ellipse = ImageProcessing.fit_ellipse_moments(blob)
+        major, minor = ellipse['axes']
+        if minor <= 0:
+            return 0.0, ellipse
+
+        circularity = minor / major
+
+        darkness = 1.0
+        if 'mean_intensity' in blob and region_mean > 0:
+            darkness = max(0.0, min(1.0, (region_mean - blob['mean_intensity']) / region_mean))
+
+        return circularity * darkness, ellipse
+
+    @staticmethod
+    def find_eye_corners(edges, pupil_x, pupil_y, search_range=100):
+        if not isinstance(edges, LazyEdgeMap):
+            edges = np.asarray(edges)
+        height, width = edges.shape
 
         py = int(pupil_y)
         py = max(0, min(height - 1, py))
 
+        start = int(pupil_x)
+        x0 = max(0, start - search_range)
+        x1 = min(width, start + search_range)
+        if isinstance(edges, LazyEdgeMap):
+            segment = edges.row_segment(py, x0, x1)
+        else:
+            segment = edges[py, x0:x1]
+
+        left_end = min(start, width - 1)
+        left = segment[1:left_end - x0 + 1][::-1]
         left_x = pupil_x
-        left_max = 0
-        for x in range(int(pupil_x), max(0, int(pupil_x) - 100), -1):
-            if x < width and edges[py][x] > left_max:
-                left_max = edges[py][x]
-                left_x = x
+        if left.size and left.max() > 0:
+            left_x = left_end - int(np.argmax(left))
 
+        right = segment[start - x0:]
         right_x = pupil_x
-        right_max = 0
-        for x in range(int(pupil_x), min(width, int(pupil_x) + 100)):
-            if x < width and edges[py][x] > right_max:
-                right_max = edges[py][x]
-                right_x = x
+        if right.size and right.max() > 0:
+            right_x = start + int(np.argmax(right))
 
         return (left_x, pupil_y), (right_x, pupil_y)
 
 
+class PupilTracker:
+    def __init__(self, window_scale=3.0, min_window=48, min_confidence=0.5, max_lost_frames=3,
+                 profiler=NULL_PROFILER, pyramid_levels=1, refine_window=3.0, histogram_tolerance=None):
+        self.window_scale = window_scale
+        self.min_window = min_window
+        self.pyramid_levels = pyramid_levels
+        self.refine_window = refine_window
+        self.min_confidence = min_confidence
+        self.max_lost_frames = max_lost_frames
+        self.preprocessor = FramePreprocessor(histogram_tolerance=histogram_tolerance)
+        self.morphology = self.preprocessor.morphology
+        self.profiler = profiler
+        self.reset()
+
+    def reset(self):
+        self.last_center = None
+        self.last_radius = None
+        self.confidence = 0.0
+        self.lost_frames = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def search_window(self):
+        half = max(self.min_window / 2, self.window_scale * self.last_radius)
+        cx, cy = self.last_center
+        return cx - half, cy - half, 2 * half, 2 * half
+
+    def _accept(self, pupil):
+        return (pupil is not None and not pupil['touches_border'] and
+                pupil['confidence'] >= self.min_confidence)
+
+    def update(self, frame):
+        profiler = self.profiler
+        if frame is None or len(frame) == 0 or len(frame[0]) == 0:
+            return None, None
+
+        frame = np.asarray(frame)
+        height, width = frame.shape[:2]
+
+        pupil = None
+        if self.last_center is not None:
+            pupil = PupilDetector.find_pupil_in_region(frame, *self.search_window(),
+                                                       profiler=profiler,
+                                                       preprocessor=self.preprocessor)
+            if self._accept(pupil):
+                self.roi_frames += 1
+                profiler.count('roi_hits')
+            else:
+                pupil = None
+
+        if pupil is None:
+            pupil = PupilDetector.find_pupil_pyramid(frame, *PupilDetector.eye_band(width, height),
+                                                     self.pyramid_levels, self.refine_window,
+                                                     profiler=profiler, preprocessor=self.preprocessor)
+            self.full_frames += 1
+            profiler.count('full_searches')
+            if pupil is None or pupil['confidence'] < self.min_confidence:
+                profiler.count('pupil_lost')
+                self.lost_frames += 1
+                if self.lost_frames > self.max_lost_frames:
+                    self.last_center = None
+                    self.last_radius = None
+                self.confidence = 0.0
+                return None, None
+
+        self.last_center = pupil['center']
+        self.last_radius = pupil['radius']
+        self.confidence = pupil['confidence']
+        self.lost_frames = 0
+
+        px, py = pupil['center']
+        with profiler.stage('corners'):
+            edges = LazyEdgeMap(frame, to_gray=ImageProcessing.rgb_to_gray)
+            left_corner, right_corner = PupilDetector.find_eye_corners(edges, px, py)
+
+        return (px, py), (left_corner, right_corner)
+
+
+def polynomial_exponents(degree):
+    exponents = [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (0, 0, 0)]
+    for total in range(2, degree + 1):
+        for power_y in range(total + 1):
+            term = (total - power_y, power_y, 0)
+            if term not in exponents:
+                exponents.append(term)
+    return exponents
+
+
+class RecursiveLeastSquares:
+    def __init__(self, n_features, n_outputs=2, initial_covariance=1e6, forgetting=1.0):
+        self.n_features = n_features
+        self.n_outputs = n_outputs
+        self.initial_covariance = initial_covariance
+        self.forgetting = forgetting
+        self.reset()
+
+    def reset(self):
+        self.covariance = np.eye(self.n_features) * self.initial_covariance
+        self.weights = np.zeros((self.n_features, self.n_outputs))
+        self.count = 0
+
+    def update(self, features, targets):
+        x = np.asarray(features, dtype=np.float64)
+        px = self.covariance @ x
+        gain = px / (self.forgetting + x @ px)
+        error = np.asarray(targets, dtype=np.float64) - x @ self.weights
+
+        self.weights += np.outer(gain, error)
+        self.covariance -= np.outer(gain, px)
+        self.covariance /= self.forgetting
+        self.count += 1
+
+    def predict(self, features):
+        return np.asarray(features, dtype=np.float64) @ self.weights
+
+
 class CalibrationSystem:
-    def __init__(self):
+    def __init__(self, min_online_samples=6, forgetting=1.0, degree=1):
         self.calibration_points = []
         self.gaze_samples = []
         self.mapping_matrix = None
+        self.coefficients = None
+        self.min_online_samples = min_online_samples
+        self.forgetting = forgetting
+        self.set_degree(degree)
+
+    def set_degree(self, degree):
+        self.degree = degree
+        self.exponents = polynomial_exponents(degree)
+        self.rls = RecursiveLeastSquares(len(self.exponents), 2, forgetting=self.forgetting)
+        self.mapping_matrix = None
+        self.coefficients = None
 
     def generate_calibration_points(self, screen_width, screen_height):
         points = []
@@ -371,47 +1332,109 @@ class CalibrationSystem:
                 'pupil': pupil_center
             })
 
+            self.rls.update(self.gaze_features(gaze_vector), screen_point)
+            if self.rls.count >= max(self.min_online_samples, len(self.exponents)):
+                self._publish_rls_mapping()
+
+    @staticmethod
+    def robust_pupil_data(detections, threshold=3.0, min_deviation=0.5):
+        valid = [(center, corners) for center, corners in detections
+                 if center is not None and corners[0] and corners[1]]
+        if not valid:
+            return None, None
+
+        points = np.array([[center[0], center[1], corners[0][0], corners[0][1],
+                            corners[1][0], corners[1][1]] for center, corners in valid])
+        gaze = np.column_stack([
+            points[:, 0] - (points[:, 2] + points[:, 4]) / 2,
+            points[:, 1] - (points[:, 3] + points[:, 5]) / 2,
+            points[:, 4] - points[:, 2]
+        ])
+
+        median = np.median(gaze, axis=0)
+        deviation = np.abs(gaze - median)
+        mad = np.maximum(1.4826 * np.median(deviation, axis=0), min_deviation)
+        inliers = (deviation <= threshold * mad).all(axis=1)
+        if not inliers.any():
+            return None, None
+
+        center_x, center_y, left_x, left_y, right_x, right_y = np.median(points[inliers], axis=0).tolist()
+        spread = float(np.max(1.4826 * np.median(np.abs(gaze[inliers] - np.median(gaze[inliers], axis=0)), axis=0)))
+        return ((center_x, center_y), ((left_x, left_y), (right_x, right_y))), spread
+
+    def refine(self, screen_point, pupil_data):
+        count = len(self.gaze_samples)
+        self.add_calibration_sample(screen_point, pupil_data)
+        return len(self.gaze_samples) > count
+
+    @staticmethod
+    def gaze_vectors(pupil_centers, left_corners, right_corners):
+        centers = np.asarray(pupil_centers, dtype=np.float64).reshape(-1, 2)
+        left = np.asarray(left_corners, dtype=np.float64).reshape(-1, 2)
+        right = np.asarray(right_corners, dtype=np.float64).reshape(-1, 2)
+
+        gaze = np.empty((len(centers), 3))
+        gaze[:, :2] = centers - (left + right) / 2
+        gaze[:, 2] = right[:, 0] - left[:, 0]
+        return gaze
+
+    def feature_matrix(self, gaze_vectors):
+        gaze = np.asarray(gaze_vectors, dtype=np.float64).reshape(-1, 3)
+        powers = [np.ones_like(gaze), gaze]
+        for _ in range(2, self.degree + 1):
+            powers.append(powers[-1] * gaze)
+
+        features = np.empty((len(gaze), len(self.exponents)))
+        for j, (power_x, power_y, power_z) in enumerate(self.exponents):
+            np.multiply(powers[power_x][:, 0], powers[power_y][:, 1], out=features[:, j])
+            features[:, j] *= powers[power_z][:, 2]
+        return features
+
+    def gaze_features(self, gaze_vector):
+        return self.feature_matrix(gaze_vector)[0]
+
+    def _set_mapping(self, coeffs_x, coeffs_y):
+        self.coefficients = np.ascontiguousarray(np.column_stack([coeffs_x, coeffs_y]), dtype=np.float64)
+        self.mapping_matrix = {
+            'x_coeffs': self.coefficients[:, 0].tolist(),
+            'y_coeffs': self.coefficients[:, 1].tolist()
+        }
+
+    def _publish_rls_mapping(self):
+        self._set_mapping(self.rls.weights[:, 0], self.rls.weights[:, 1])
+
+    def rebuild_online_model(self):
+        self.rls.reset()
+        for sample in self.gaze_samples:
+            self.rls.update(self.gaze_features(sample['gaze_vector']), sample['screen'])
+
     def compute_mapping(self):
-        if len(self.gaze_samples) < 10:
+        if len(self.gaze_samples) < max(10, len(self.exponents)):
             return False
 
-        X = []
-        Y_x = []
-        Y_y = []
+        if self.rls.count == len(self.gaze_samples):
+            self._publish_rls_mapping()
+            return True
 
-        for sample in self.gaze_samples:
-            gv = sample['gaze_vector']
-            X.append([gv[0], gv[1], gv[2], gv[0]*gv[1], 1])
-            Y_x.append(sample['screen'][0])
-            Y_y.append(sample['screen'][1])
+        X = self.feature_matrix([sample['gaze_vector'] for sample in self.gaze_samples])
+        screen = np.array([sample['screen'] for sample in self.gaze_samples], dtype=np.float64)
 
         try:
-            coeffs_x = self.least_squares(X, Y_x)
-            coeffs_y = self.least_squares(X, Y_y)
+            coeffs_x = self.least_squares(X, screen[:, 0])
+            coeffs_y = self.least_squares(X, screen[:, 1])
 
-            self.mapping_matrix = {
-                'x_coeffs': coeffs_x,
-                'y_coeffs': coeffs_y
-            }
+            self._set_mapping(coeffs_x, coeffs_y)
             return True
         except:
             return False
 
     @staticmethod
     def least_squares(X, Y):
-        n = len(X)
-        m = len(X[0])
-
-        XTX = [[0] * m for _ in range(m)]
-        for i in range(m):
-            for j in range(m):
-                for k in range(n):
-                    XTX[i][j] += X[k][i] * X[k][j]
+        X = np.asarray(X, dtype=np.float64)
+        Y = np.asarray(Y, dtype=np.float64)
 
-        XTY = [0] * m
-        for i in range(m):
-            for k in range(n):
-                XTY[i] += X[k][i] * Y[k]
+        XTX = (X.T @ X).tolist()
+        XTY = (X.T @ Y).tolist()
 
         coeffs = CalibrationSystem.gauss_elimination(XTX, XTY)
         return coeffs
@@ -448,8 +1471,15 @@ class CalibrationSystem:
 
         return x
 
+    def map_gaze_batch(self, gaze_vectors):
+        coefficients = self.coefficients
+        if coefficients is None:
+            return None
+        return self.feature_matrix(gaze_vectors) @ coefficients
+
     def map_gaze_to_screen(self, pupil_data):
-        if self.mapping_matrix is None or pupil_data[0] is None:
+        coefficients = self.coefficients
+        if coefficients is None or pupil_data[0] is None:
             return None
 
         pupil_center, eye_corners = pupil_data
@@ -465,18 +1495,110 @@ class CalibrationSystem:
             right_corner[0] - left_corner[0]
         ]
 
-        features = [
-            gaze_vector[0],
-            gaze_vector[1],
-            gaze_vector[2],
-            gaze_vector[0] * gaze_vector[1],
-            1
+        screen_x, screen_y = (self.feature_matrix(gaze_vector) @ coefficients)[0].tolist()
+
+        return (screen_x, screen_y)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'degree': self.degree,
+                'gaze_samples': self.gaze_samples,
+                'mapping_matrix': self.mapping_matrix
+            }, f)
+
+    def load(self, path):
+        with open(path) as f:
+            data = json.load(f)
+
+        self.set_degree(data.get('degree', 1))
+        self.gaze_samples = [
+            {
+                'screen': tuple(sample['screen']),
+                'gaze_vector': sample['gaze_vector'],
+                'pupil': tuple(sample['pupil'])
+            }
+            for sample in data.get('gaze_samples', [])
         ]
+        mapping_matrix = data.get('mapping_matrix')
+        if mapping_matrix is not None:
+            self._set_mapping(mapping_matrix['x_coeffs'], mapping_matrix['y_coeffs'])
+        self.rebuild_online_model()
+        return self.mapping_matrix is not None
+
+
+class CalibrationSampler:
+    def __init__(self, camera, burst_size=20, min_samples=8, settle_time=0.4, max_duration=2.5,
+                 stable_spread=1.5, workers=4):
+        self.camera = camera
+        self.burst_size = burst_size
+        self.min_samples = min_samples
+        self.settle_time = settle_time
+        self.max_duration = max_duration
+        self.stable_spread = stable_spread
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.cancelled = threading.Event()
+
+    def start(self, screen_point, on_done):
+        self.cancelled.clear()
+        threading.Thread(target=self._sample, args=(screen_point, on_done), daemon=True).start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+    def _next_frame(self, last_sequence):
+        if hasattr(self.camera, 'wait_packet'):
+            packet = self.camera.wait_packet(last_sequence, timeout=0.1)
+            if packet is None:
+                return None, last_sequence
+            return np.array(packet[0]), packet[1]
+
+        time.sleep(0.033)
+        frame = self.camera.read_frame()
+        return (np.array(frame, dtype=np.uint8) if frame is not None else None), last_sequence
 
-        screen_x = sum(features[i] * self.mapping_matrix['x_coeffs'][i] for i in range(5))
-        screen_y = sum(features[i] * self.mapping_matrix['y_coeffs'][i] for i in range(5))
+    def _sample(self, screen_point, on_done):
+        if self.cancelled.wait(self.settle_time):
+            return
 
-        return (screen_x, screen_y)
+        deadline = time.time() + self.max_duration
+        futures = []
+        detections = []
+        submitted = 0
+        last_sequence = -1
+        result = None
+
+        while (not self.cancelled.is_set() and time.time() < deadline and
+               submitted < self.burst_size):
+            frame, last_sequence = self._next_frame(last_sequence)
+            if frame is not None:
+                futures.append(self.executor.submit(PupilDetector.detect_pupil, frame))
+                submitted += 1
+
+            done = [future for future in futures if future.done()]
+            for future in done:
+                futures.remove(future)
+                if future.result()[0] is not None:
+                    detections.append(future.result())
+
+            if len(detections) >= self.min_samples:
+                result, spread = CalibrationSystem.robust_pupil_data(detections)
+                if spread is not None and spread <= self.stable_spread:
+                    break
+                result = None
+
+        if result is None and not self.cancelled.is_set():
+            for future in concurrent.futures.as_completed(futures):
+                if future.result()[0] is not None:
+                    detections.append(future.result())
+            result, _ = CalibrationSystem.robust_pupil_data(detections)
+
+        if not self.cancelled.is_set():
+            on_done(screen_point, result if result else (None, None))
 
 
 class MockCamera:
@@ -524,15 +1646,261 @@ class MockCamera:
         self.running = False
 
 
+class SyntheticCamera:
+    def __init__(self, width=640, height=480, fps=30, seed=None, ring_size=8,
+                 pupil_radius=15, noise=0.0):
+        self.frame_width = width
+        self.frame_height = height
+        self.fps = fps
+        self.seed = seed
+        self.pupil_radius = pupil_radius
+        self.noise = noise
+        self.running = False
+
+        self.ring = np.empty((ring_size, height, width, 3), dtype=np.uint8)
+        self.sequences = np.full(ring_size, -1, dtype=np.int64)
+        self.timestamps = np.zeros(ring_size)
+        self.noise_buffer = np.empty((height, width), dtype=np.float32)
+        self.frame_cond = threading.Condition()
+
+        offsets = np.arange(-pupil_radius, pupil_radius)
+        dist = np.sqrt(offsets[:, None] ** 2 + offsets[None, :] ** 2)
+        self.pupil_mask = dist < pupil_radius
+        self.pupil_patch = (30 * (1 - dist / pupil_radius)).astype(np.uint8)
+
+        self.reset()
+
+    def reset(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.sequence = -1
+        self.sequences[:] = -1
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def _capture_loop(self):
+        next_tick = time.time()
+        while self.running:
+            self.generate_next()
+            next_tick += 1.0 / self.fps
+            delay = next_tick - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.time()
+
+    def generate_next(self):
+        sequence = self.sequence + 1
+        slot = sequence % len(self.ring)
+        with self.frame_cond:
+            self.sequences[slot] = -1
+        self._render(self.ring[slot], sequence)
+
+        with self.frame_cond:
+            self.sequences[slot] = sequence
+            self.timestamps[slot] = time.time()
+            self.sequence = sequence
+            self.frame_cond.notify_all()
+
+        return sequence
+
+    def _render(self, frame, sequence):
+        if self.noise > 0:
+            self.rng.standard_normal(dtype=np.float32, out=self.noise_buffer)
+            np.multiply(self.noise_buffer, self.noise, out=self.noise_buffer)
+            np.add(self.noise_buffer, 128, out=self.noise_buffer)
+            np.clip(self.noise_buffer, 0, 255, out=self.noise_buffer)
+            frame[..., 0] = self.noise_buffer
+            frame[..., 1] = frame[..., 0]
+            frame[..., 2] = frame[..., 0]
+        else:
+            frame.fill(128)
+
+        t = sequence / self.fps
+        jitter_x, jitter_y = self.rng.normal(0, 0.5, 2)
+        pupil_x = self.frame_width // 2 + int(20 * math.sin(t * 2) + jitter_x)
+        pupil_y = self.frame_height // 2 + int(10 * math.cos(t * 3) + jitter_y)
+
+        r = self.pupil_radius
+        y1, y2 = max(0, pupil_y - r), min(self.frame_height, pupil_y + r)
+        x1, x2 = max(0, pupil_x - r), min(self.frame_width, pupil_x + r)
+        if y1 >= y2 or x1 >= x2:
+            return
+
+        py, px = y1 - (pupil_y - r), x1 - (pupil_x - r)
+        mask = self.pupil_mask[py:py + y2 - y1, px:px + x2 - x1]
+        patch = self.pupil_patch[py:py + y2 - y1, px:px + x2 - x1]
+        region = frame[y1:y2, x1:x2]
+        for channel in range(3):
+            np.copyto(region[..., channel], patch, where=mask)
+
+    def _packet(self, slot):
+        frame = self.ring[slot].view()
+        frame.flags.writeable = False
+        return frame, int(self.sequences[slot]), float(self.timestamps[slot])
+
+    # The view is overwritten in place once its slot comes round again (ring_size frames later);
+    # a consumer that may be slower than that checks packet_valid(sequence) after using it.
+    def read_packet(self):
+        with self.frame_cond:
+            if self.sequence < 0:
+                return None
+            return self._packet(self.sequence % len(self.ring))
+
+    def wait_packet(self, last_sequence=-1, timeout=None):
+        with self.frame_cond:
+            if self.sequence <= last_sequence:
+                self.frame_cond.wait(timeout)
+            if self.sequence <= last_sequence:
+                return None
+            return self._packet(self.sequence % len(self.ring))
+
+    def packet_valid(self, sequence):
+        with self.frame_cond:
+            return self.sequences[sequence % len(self.ring)] == sequence
+
+    def read_frame(self):
+        packet = self.read_packet()
+        return packet[0] if packet else None
+
+    def stop(self):
+        self.running = False
+
+
+class Tracker:
+    def __init__(self, camera=None, calibration=None, gaze_filter=GAZE_FILTER, queue_size=1,
+                 profiler=NULL_PROFILER, event_detector=None):
+        self.camera = camera if camera is not None else SyntheticCamera()
+        if isinstance(calibration, str):
+            path, calibration = calibration, CalibrationSystem()
+            calibration.load(path)
+        self.calibration = calibration if calibration is not None else CalibrationSystem()
+        self.gaze_filter = make_filter(gaze_filter) if gaze_filter else None
+        self.event_detector = event_detector
+        self.queue_size = queue_size
+        self.profiler = profiler
+        self.pupil_tracker = PupilTracker(profiler=profiler)
+        self.pipeline = None
+        self.running = False
+        self.owns_camera = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.pupil_tracker.reset()
+        if self.gaze_filter:
+            self.gaze_filter.reset()
+        if self.event_detector:
+            self.event_detector.reset()
+        self.pipeline = TrackingPipeline(self.camera, self._detect, self._map_gaze, self.queue_size,
+                                         profiler=self.profiler)
+        self.owns_camera = not getattr(self.camera, 'running', False)
+        if self.owns_camera:
+            self.camera.start()
+        self.pipeline.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.pipeline.stop()
+        if self.owns_camera:
+            self.camera.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _detect(self, frame):
+        center, corners = self.pupil_tracker.update(frame)
+        return center, corners, self.pupil_tracker.confidence
+
+    def _map_gaze(self, pupil_data):
+        return self.calibration.map_gaze_to_screen(pupil_data[:2])
+
+    def _sample(self, item):
+        center, corners, confidence = item['pupil_data']
+        screen_pos = item['screen_pos']
+        filtered_pos = None
+        if screen_pos and self.gaze_filter:
+            filtered_pos = self.gaze_filter.update(screen_pos, item['timestamp'])
+        events = []
+        if screen_pos and self.event_detector:
+            events = self.event_detector.update(item['timestamp'], *screen_pos)
+        return {
+            'timestamp': item['timestamp'],
+            'sequence': item.get('sequence'),
+            'pupil_center': center,
+            'eye_corners': corners,
+            'confidence': confidence,
+            'screen_pos': screen_pos,
+            'filtered_pos': filtered_pos,
+            'events': events
+        }
+
+    def _next(self, timeout):
+        deadline = time.time() + timeout if timeout is not None else None
+        while self.running:
+            item = self.pipeline.gaze_points.get(timeout=0.1)
+            if item is not None:
+                return self._sample(item)
+            if self.pipeline.finished():
+                return None
+            if deadline is not None and time.time() >= deadline:
+                return None
+        return None
+
+    def samples(self, max_samples=None, timeout=None):
+        self.start()
+        count = 0
+        while max_samples is None or count < max_samples:
+            sample = self._next(timeout)
+            if sample is None:
+                return
+            count += 1
+            yield sample
+
+    def __iter__(self):
+        return self.samples()
+
+    async def stream(self, max_samples=None, timeout=None):
+        import asyncio
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        count = 0
+        while max_samples is None or count < max_samples:
+            sample = await loop.run_in_executor(None, self._next, timeout)
+            if sample is None:
+                return
+            count += 1
+            yield sample
+
+    def __aiter__(self):
+        return self.stream()
+
+    def latest(self):
+        item = self.pipeline.latest() if self.pipeline else None
+        return self._sample(item) if item else None
+
+
 class EyeTrackingGUI:
-    def __init__(self):
+    def __init__(self, publisher=None):
+        _import_tkinter()
+        self.publisher = publisher
         self.root = tk.Tk()
         self.root.title("Eye Tracking System")
 
         self.screen_width = self.root.winfo_screenwidth()
         self.screen_height = self.root.winfo_screenheight()
 
-        self.camera = MockCamera()
+        self.camera = SyntheticCamera()
         self.calibration = CalibrationSystem()
 
         self.calibration_mode = False
@@ -596,6 +1964,7 @@ class EyeTrackingGUI:
             self.screen_width, self.screen_height
         )
         self.current_point_idx = 0
+        self.calibration_sampler = CalibrationSampler(self.camera)
 
         self.show_calibration_point()
 
@@ -613,42 +1982,30 @@ class EyeTrackingGUI:
         self.calib_canvas.create_oval(x-10, y-10, x+10, y+10,
                                       fill='white', outline='')
 
-        self.root.after(1500, self.capture_calibration_sample)
+        self.calibration_sampler.start(
+            self.calib_points[self.current_point_idx],
+            lambda point, pupil_data: self.root.after(
+                0, lambda: self.capture_calibration_sample(point, pupil_data))
+        )
 
-    def capture_calibration_sample(self):
-        frame = self.camera.read_frame()
-        if frame:
-            pupil_data = PupilDetector.detect_pupil(frame)
-            screen_point = self.calib_points[self.current_point_idx]
-            self.calibration.add_calibration_sample(screen_point, pupil_data)
+    def capture_calibration_sample(self, screen_point, pupil_data):
+        self.calibration.add_calibration_sample(screen_point, pupil_data)
 
         self.current_point_idx += 1
         self.show_calibration_point()
 
     def finish_calibration(self):
+        self.calibration_sampler.shutdown()
         self.calib_canvas.delete('all')
-
-        processing_label = tk.Label(self.calib_canvas,
-                                    text="Lütfen bekleyiniz, kalibrasyon işleniyor...",
-                                    font=('Arial', 20, 'bold'),
-                                    bg='#7f8c8d', fg='white')
-        processing_label.place(relx=0.5, rely=0.5, anchor='center')
-
-        self.root.update()
-
-        def compute():
-            time.sleep(2)
-            success = self.calibration.compute_mapping()
-
-            self.root.after(0, lambda: self.calibration_complete(success))
-
-        threading.Thread(target=compute, daemon=True).start()
+        success = self.calibration.compute_mapping()
+        self.calibration_complete(success)
 
     def calibration_complete(self, success):
         self.calib_window.destroy()
         self.calibration_mode = False
 
         if success:
+            self.calibration.save(CALIBRATION_FILE)
             self.status_label.config(text="Kalibrasyon tamamlandı!")
             self.track_btn.config(state=tk.NORMAL)
             messagebox.showinfo("Başarılı", "Kalibrasyon başarıyla tamamlandı!")
@@ -678,41 +2035,78 @@ class EyeTrackingGUI:
                             font=('Arial', 12), bg='#e74c3c', fg='white')
         exit_btn.place(x=20, y=20)
 
+        self.tracker = Tracker(self.camera, self.calibration)
+        self.tracker.start()
+        self.pupil_tracker = self.tracker.pupil_tracker
+        self.tracking_pipeline = self.tracker.pipeline
+        self.gaze_filter = self.tracker.gaze_filter
+
+        self.profiler = None
+        self.stats_overlay = self.track_canvas.create_text(self.screen_width - 20, 20, anchor='ne',
+                                                           text="", font=('Courier', 11),
+                                                           fill='#2c3e50')
+        self.stats_updated = 0.0
+        self.track_window.bind('<KeyPress-p>', lambda event: self.toggle_stats_overlay())
+        self.track_window.focus_set()
+        self.last_pupil_data = None
+        self.track_canvas.bind('<Button-1>', self.refine_calibration)
+
         self.update_tracking()
 
     def update_tracking(self):
         if not self.tracking_mode:
             return
 
-        frame = self.camera.read_frame()
-        if frame:
-            pupil_data = PupilDetector.detect_pupil(frame)
-            screen_pos = self.calibration.map_gaze_to_screen(pupil_data)
-
-            if screen_pos:
-                self.gaze_x, self.gaze_y = screen_pos
-
-                alpha = 0.3
-                self.smoothed_x = alpha * self.gaze_x + (1 - alpha) * self.smoothed_x
-                self.smoothed_y = alpha * self.gaze_y + (1 - alpha) * self.smoothed_y
-
-                self.smoothed_x = max(10, min(self.screen_width - 10, self.smoothed_x))
-                self.smoothed_y = max(10, min(self.screen_height - 10, self.smoothed_y))
-
-                self.track_canvas.coords(self.gaze_indicator,
-                                        self.smoothed_x - 10,
-                                        self.smoothed_y - 10,
-                                        self.smoothed_x + 10,
-                                        self.smoothed_y + 10)
-
-        self.root.after(33, self.update_tracking)
+        sample = self.tracker.latest()
+        if sample:
+            self.last_pupil_data = (sample['pupil_center'], sample['eye_corners'])
+            if sample['screen_pos']:
+                self.gaze_x, self.gaze_y = sample['screen_pos']
+            if self.publisher:
+                self.publisher.publish_sample(sample)
+
+        now = time.time()
+        predicted = self.gaze_filter.predict(now)
+        if predicted:
+            if self.profiler:
+                self.profiler.record('prediction', now - self.gaze_filter.timestamp)
+            self.smoothed_x = max(10, min(self.screen_width - 10, predicted[0]))
+            self.smoothed_y = max(10, min(self.screen_height - 10, predicted[1]))
+
+            self.track_canvas.coords(self.gaze_indicator,
+                                    self.smoothed_x - 10,
+                                    self.smoothed_y - 10,
+                                    self.smoothed_x + 10,
+                                    self.smoothed_y + 10)
+
+        if self.profiler and time.time() - self.stats_updated > 0.5:
+            self.stats_updated = time.time()
+            self.track_canvas.itemconfigure(self.stats_overlay,
+                                            text='\n'.join(self.profiler.overlay_lines()))
+
+        self.root.after(15, self.update_tracking)
+
+    def refine_calibration(self, event):
+        if self.last_pupil_data and self.calibration.refine((event.x, event.y), self.last_pupil_data):
+            self.status_label.config(text=f"Kalibrasyon güncellendi ({len(self.calibration.gaze_samples)} örnek)")
+
+    def toggle_stats_overlay(self):
+        self.profiler = None if self.profiler else Profiler()
+        profiler = self.profiler or NULL_PROFILER
+        self.pupil_tracker.profiler = profiler
+        self.tracking_pipeline.profiler = profiler
+        if not self.profiler:
+            self.track_canvas.itemconfigure(self.stats_overlay, text="")
 
     def stop_tracking(self):
         self.tracking_mode = False
+        self.tracker.stop()
         self.track_window.destroy()
         self.track_btn.config(state=tk.NORMAL)
 
     def quit_app(self):
+        if self.tracking_mode:
+            self.tracker.stop()
         self.camera.stop()
         self.root.quit()
 
@@ -721,5 +2115,22 @@ class EyeTrackingGUI:
 
 
 if __name__ == "__main__":
-    app = EyeTrackingGUI()
-    app.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Eye Tracking System")
+    parser.add_argument('--stream', default=None,
+                        help="Gaze örneklerini yayınla: HOST:PORT (TCP) veya Unix soket yolu")
+    args = parser.parse_args()
+
+    publisher = None
+    if args.stream:
+        from streaming import GazePublisher
+        publisher = GazePublisher(args.stream)
+        publisher.start()
+
+    app = EyeTrackingGUI(publisher)
+    try:
+        app.run()
+    finally:
+        if publisher:
+            publisher.stop()
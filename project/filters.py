@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+
+class ExponentialFilter:
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.timestamp = None
+
+    def update(self, point, timestamp):
+        point = np.asarray(point, dtype=np.float64)
+        if self.state is None:
+            self.state = point
+        else:
+            self.state = self.alpha * point + (1 - self.alpha) * self.state
+        self.timestamp = timestamp
+        return tuple(self.state.tolist())
+
+    def predict(self, timestamp):
+        return tuple(self.state.tolist()) if self.state is not None else None
+
+
+def _damped_horizon(horizon, velocity_decay):
+    if velocity_decay is None:
+        return horizon
+    return velocity_decay * (1.0 - math.exp(-horizon / velocity_decay))
+
+
+def _smoothing_factor(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=5.0, max_prediction=0.1, velocity_decay=0.05):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_prediction = max_prediction
+        self.velocity_decay = velocity_decay
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.velocity = np.zeros(2)
+        self.timestamp = None
+
+    def update(self, point, timestamp):
+        point = np.asarray(point, dtype=np.float64)
+        if self.state is None:
+            self.state = point
+            self.timestamp = timestamp
+            return tuple(self.state.tolist())
+
+        dt = max(timestamp - self.timestamp, 1e-3)
+        alpha_d = _smoothing_factor(self.d_cutoff, dt)
+        self.velocity = alpha_d * (point - self.state) / dt + (1 - alpha_d) * self.velocity
+
+        cutoff = self.min_cutoff + self.beta * math.hypot(*self.velocity)
+        alpha = _smoothing_factor(cutoff, dt)
+        self.state = alpha * point + (1 - alpha) * self.state
+        self.timestamp = timestamp
+        return tuple(self.state.tolist())
+
+    def predict(self, timestamp):
+        if self.state is None:
+            return None
+        horizon = min(max(timestamp - self.timestamp, 0.0), self.max_prediction)
+        return tuple((self.state + self.velocity * _damped_horizon(horizon, self.velocity_decay)).tolist())
+
+
+class KalmanFilter:
+    def __init__(self, process_noise=1e6, measurement_noise=100.0, max_prediction=0.1, velocity_decay=0.05):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_prediction = max_prediction
+        self.velocity_decay = velocity_decay
+        self.observation = np.hstack([np.eye(2), np.zeros((2, 2))])
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.covariance = None
+        self.timestamp = None
+
+    def _transition(self, dt):
+        transition = np.eye(4)
+        transition[0, 2] = transition[1, 3] = _damped_horizon(dt, self.velocity_decay)
+        if self.velocity_decay is not None:
+            transition[2, 2] = transition[3, 3] = math.exp(-dt / self.velocity_decay)
+
+        block = self.process_noise * np.array([[dt ** 3 / 3, dt ** 2 / 2],
+                                               [dt ** 2 / 2, dt]])
+        noise = np.zeros((4, 4))
+        noise[0::2, 0::2] = block
+        noise[1::2, 1::2] = block
+        return transition, noise
+
+    def update(self, point, timestamp):
+        point = np.asarray(point, dtype=np.float64)
+        if self.state is None:
+            self.state = np.array([point[0], point[1], 0.0, 0.0])
+            self.covariance = np.diag([self.measurement_noise] * 2 + [1e6] * 2)
+            self.timestamp = timestamp
+            return tuple(point.tolist())
+
+        transition, noise = self._transition(max(timestamp - self.timestamp, 1e-3))
+        state = transition @ self.state
+        covariance = transition @ self.covariance @ transition.T + noise
+
+        innovation = point - state[:2]
+        innovation_cov = covariance[:2, :2] + np.eye(2) * self.measurement_noise
+        gain = covariance[:, :2] @ np.linalg.inv(innovation_cov)
+
+        self.state = state + gain @ innovation
+        self.covariance = covariance - gain @ self.observation @ covariance
+        self.timestamp = timestamp
+        return tuple(self.state[:2].tolist())
+
+    def predict(self, timestamp):
+        if self.state is None:
+            return None
+        horizon = min(max(timestamp - self.timestamp, 0.0), self.max_prediction)
+        return tuple((self.state[:2] + self.state[2:] * _damped_horizon(horizon, self.velocity_decay)).tolist())
+
+
+GAZE_FILTERS = {
+    'ema': ExponentialFilter,
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanFilter,
+}
+
+
+def make_filter(name, **kwargs):
+    return GAZE_FILTERS[name](**kwargs)
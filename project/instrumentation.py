@@ -0,0 +1,140 @@
+import collections
+import json
+import threading
+import time
+
+import numpy as np
+
+
+class RollingHistogram:
+    def __init__(self, window=300):
+        self.samples = np.zeros(window)
+        self.count = 0
+
+    def add(self, value):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+
+    def values(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def summary(self):
+        values = self.values() * 1000
+        if values.size == 0:
+            return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'count': self.count,
+            'mean_ms': float(values.mean()),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p95_ms': float(np.percentile(values, 95)),
+            'max_ms': float(values.max())
+        }
+
+    def histogram(self, bins=10):
+        return np.histogram(self.values() * 1000, bins=bins)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def count(self, name, n=1):
+        pass
+
+    def record(self, name, seconds):
+        pass
+
+    def frame_done(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, window=300, sink=None, sink_interval=30):
+        self.window = window
+        self.sink = sink
+        self.sink_interval = sink_interval
+        self.stages = collections.OrderedDict()
+        self.counters = collections.Counter()
+        self.frames = 0
+        # detect/map threads record while the UI or the sink reads
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        with self.lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def frame_done(self):
+        with self.lock:
+            self.frames += 1
+            flush = self.sink and self.frames % self.sink_interval == 0
+        if flush:
+            self.sink(self.snapshot())
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'frames': self.frames,
+                'stages': {name: histogram.summary() for name, histogram in self.stages.items()},
+                'counters': dict(self.counters)
+            }
+
+    def overlay_lines(self):
+        snapshot = self.snapshot()
+        lines = [f"{'aşama':12s} {'ort':>7s} {'p95':>7s} ms"]
+        for name, summary in snapshot['stages'].items():
+            lines.append(f"{name:12s} {summary['mean_ms']:7.2f} {summary['p95_ms']:7.2f}")
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"{name}: {value}")
+        return lines
+
+
+class JsonLinesSink:
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def __call__(self, snapshot):
+        self.file.write(json.dumps(dict(snapshot, time=time.time())) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
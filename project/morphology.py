@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class BufferPool:
+    def __init__(self):
+        self.buffers = {}
+
+    def buffer(self, key, shape, dtype=np.uint8):
+        size = int(np.prod(shape))
+        flat = self.buffers.get(key)
+        if flat is None or flat.size < size or flat.dtype != dtype:
+            flat = np.empty(size, dtype=dtype)
+            self.buffers[key] = flat
+        return flat[:size].reshape(shape)
+
+
+class Morphology(BufferPool):
+
+    def _running_pass(self, src, size, axis, op, pad_value, out):
+        # van Herk/Gil-Werman: prefix and suffix extremes inside blocks of
+        # `size` samples, so every window is covered by one suffix and one prefix.
+        if axis == 0:
+            src = src.T
+            out = out.T
+
+        lines, n = src.shape
+        half = size // 2
+        blocks = (n + size - 1 + size - 1) // size
+        length = blocks * size
+
+        padded = self.buffer(('padded', axis), (lines, length), src.dtype)
+        padded[:, :half] = pad_value
+        padded[:, half:half + n] = src
+        padded[:, half + n:] = pad_value
+
+        view = padded.reshape(lines, blocks, size)
+        forward = self.buffer(('forward', axis), (lines, blocks, size), src.dtype)
+        backward = self.buffer(('backward', axis), (lines, blocks, size), src.dtype)
+        op.accumulate(view, axis=2, out=forward)
+        op.accumulate(view[:, :, ::-1], axis=2, out=backward[:, :, ::-1])
+
+        forward = forward.reshape(lines, length)
+        backward = backward.reshape(lines, length)
+        op(backward[:, :n], forward[:, size - 1:size - 1 + n], out=out)
+
+    def _separable(self, image, kernel_size, op, pad_value, out):
+        image = np.asarray(image, dtype=np.uint8)
+        if out is None:
+            out = np.empty_like(image)
+
+        size = 2 * (kernel_size // 2) + 1
+        if size == 1 or image.size == 0:
+            out[...] = image
+            return out
+
+        rows = self.buffer('rows', image.shape, image.dtype)
+        self._running_pass(image, size, 1, op, pad_value, rows)
+        self._running_pass(rows, size, 0, op, pad_value, out)
+        return out
+
+    def erode(self, image, kernel_size=3, out=None):
+        return self._separable(image, kernel_size, np.minimum, 255, out)
+
+    def dilate(self, image, kernel_size=3, out=None):
+        return self._separable(image, kernel_size, np.maximum, 0, out)
+
+    def open(self, image, kernel_size=3, out=None):
+        image = np.asarray(image, dtype=np.uint8)
+        stage = self.buffer('stage', image.shape, image.dtype)
+        self.erode(image, kernel_size, out=stage)
+        return self.dilate(stage, kernel_size, out=out)
+
+    def close(self, image, kernel_size=3, out=None):
+        image = np.asarray(image, dtype=np.uint8)
+        stage = self.buffer('stage', image.shape, image.dtype)
+        self.dilate(image, kernel_size, out=stage)
+        return self.erode(stage, kernel_size, out=out)
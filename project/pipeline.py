@@ -0,0 +1,182 @@
+import collections
+import threading
+import time
+
+from instrumentation import NULL_PROFILER
+
+
+class LatestQueue:
+    # lossless: put waits for room and get returns the oldest item (deterministic replay)
+    def __init__(self, maxsize=1, lossless=False):
+        self.items = collections.deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.lossless = lossless
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            while self.lossless and len(self.items) == self.items.maxlen and not self.closed:
+                self.condition.wait()
+            dropped = len(self.items) == self.items.maxlen
+            if dropped:
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify_all()
+            return dropped
+
+    def get(self, timeout=None):
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if self.lossless:
+                item = self.items.popleft() if self.items else None
+                self.condition.notify_all()
+                return item
+            return self._pop_latest()
+
+    def get_latest(self):
+        with self.condition:
+            return self._pop_latest()
+
+    def _pop_latest(self):
+        if not self.items:
+            return None
+        item = self.items.pop()
+        self.dropped += len(self.items)
+        self.items.clear()
+        return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def finished(self):
+        with self.condition:
+            return self.closed and not self.items
+
+
+class TrackingPipeline:
+    def __init__(self, camera, detect, map_gaze, queue_size=1, capture_interval=0.033,
+                 profiler=NULL_PROFILER):
+        self.camera = camera
+        self.detect = detect
+        self.map_gaze = map_gaze
+        self.capture_interval = capture_interval
+        self.profiler = profiler
+
+        # cameras that are not paced in real time (e.g. ReplayCamera(realtime=False)) are never dropped
+        lossless = not getattr(camera, 'realtime', True)
+        self.frames = LatestQueue(queue_size, lossless)
+        self.detections = LatestQueue(queue_size, lossless)
+        self.gaze_points = LatestQueue(queue_size, lossless)
+
+        self.running = False
+        self.threads = []
+        self.counts = {'captured': 0, 'detected': 0, 'mapped': 0, 'torn': 0}
+
+    def start(self):
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._detect_loop, daemon=True),
+            threading.Thread(target=self._map_loop, daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        for queue in (self.frames, self.detections, self.gaze_points):
+            queue.close()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        self.threads = []
+
+    def _capture_loop(self):
+        if hasattr(self.camera, 'wait_packet'):
+            self._packet_capture_loop()
+            return
+
+        next_tick = time.time()
+        while self.running:
+            frame = self.camera.read_frame()
+            if frame is not None:
+                now = time.time()
+                if self.frames.put({'timestamp': now, 'captured_at': now, 'frame': frame}):
+                    self.profiler.count('frames_dropped')
+                self.counts['captured'] += 1
+
+            next_tick += self.capture_interval
+            delay = next_tick - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.time()
+
+    def _packet_capture_loop(self):
+        last_sequence = -1
+        while self.running:
+            packet = self.camera.wait_packet(last_sequence, timeout=0.1)
+            if packet is None:
+                if getattr(self.camera, 'finished', False):
+                    self.frames.close()
+                    return
+                continue
+            frame, last_sequence, timestamp = packet
+            if self.frames.put({'timestamp': timestamp, 'captured_at': time.time(), 'sequence': last_sequence,
+                                'frame': frame}):
+                self.profiler.count('frames_dropped')
+            self.counts['captured'] += 1
+
+    def _detect_loop(self):
+        while self.running:
+            item = self.frames.get(timeout=0.1)
+            if item is None:
+                if self.frames.finished():
+                    self.detections.close()
+                    return
+                continue
+            with self.profiler.stage('detect'):
+                pupil_data = self.detect(item['frame'])
+            if not self._frame_valid(item):
+                # the camera reused the ring slot while the frame was queued or being detected
+                self.profiler.count('frames_torn')
+                self.counts['torn'] += 1
+                continue
+            self.detections.put({'timestamp': item['timestamp'], 'captured_at': item['captured_at'],
+                                 'sequence': item.get('sequence'), 'pupil_data': pupil_data})
+            self.counts['detected'] += 1
+
+    def _frame_valid(self, item):
+        packet_valid = getattr(self.camera, 'packet_valid', None)
+        return packet_valid is None or item.get('sequence') is None or packet_valid(item['sequence'])
+
+    def _map_loop(self):
+        while self.running:
+            item = self.detections.get(timeout=0.1)
+            if item is None:
+                if self.detections.finished():
+                    self.gaze_points.close()
+                    return
+                continue
+            item['screen_pos'] = self.map_gaze(item['pupil_data'])
+            self.gaze_points.put(item)
+            self.counts['mapped'] += 1
+            self.profiler.record('latency', time.time() - item['captured_at'])
+            self.profiler.frame_done()
+
+    def latest(self):
+        return self.gaze_points.get_latest()
+
+    def finished(self):
+        return self.gaze_points.finished()
+
+    def dropped(self):
+        return {
+            'frames': self.frames.dropped,
+            'detections': self.detections.dropped,
+            'gaze_points': self.gaze_points.dropped
+        }
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from eye_tracker import SyntheticCamera
+
+
+MAGIC = b'ETREC001'
+HEADER_SIZE = 256
+RECORDING_EXTENSION = '.etrec'
+
+
+def record_dtype(shape, dtype=np.uint8):
+    return np.dtype([
+        ('sequence', '<u8'),
+        ('timestamp', '<f8'),
+        ('frame', np.dtype(dtype), tuple(shape)),
+    ])
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+
+    if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+        raise ValueError(f"{path} bir kare kaydı değil")
+
+    info = json.loads(header[len(MAGIC):].rstrip(b'\0 ').decode('ascii'))
+    return tuple(info['shape']), np.dtype(info['dtype'])
+
+
+def open_recording(path):
+    shape, dtype = read_header(path)
+    records = record_dtype(shape, dtype)
+    count = (os.path.getsize(path) - HEADER_SIZE) // records.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=records)
+    return np.memmap(path, dtype=records, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+class FrameRecorder:
+    def __init__(self, path, shape, dtype=np.uint8):
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.record = np.zeros((), dtype=record_dtype(self.shape, self.dtype))
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            if read_header(path) != (self.shape, self.dtype):
+                raise ValueError(f"{path} farklı kare boyutu veya tipiyle kaydedilmiş")
+            size = os.path.getsize(path)
+            self.count = (size - HEADER_SIZE) // self.record.itemsize
+            self.file = open(path, 'r+b')
+            self.file.truncate(HEADER_SIZE + self.count * self.record.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.count = 0
+            self.file = open(path, 'wb')
+            info = json.dumps({'shape': list(self.shape), 'dtype': self.dtype.str}).encode('ascii')
+            self.file.write((MAGIC + info).ljust(HEADER_SIZE, b'\0'))
+
+    def write(self, frame, timestamp=None, sequence=None):
+        self.record['sequence'] = self.count if sequence is None else sequence
+        self.record['timestamp'] = time.time() if timestamp is None else timestamp
+        self.record['frame'] = frame
+        self.file.write(self.record.data)
+        self.count += 1
+
+    def record_camera(self, camera, n_frames=None, duration=None):
+        end_time = time.time() + duration if duration is not None else None
+        last_sequence = -1
+        written = 0
+
+        while ((n_frames is None or written < n_frames) and
+               (end_time is None or time.time() < end_time)):
+            if hasattr(camera, 'wait_packet'):
+                packet = camera.wait_packet(last_sequence, timeout=0.1)
+                if packet is None:
+                    if getattr(camera, 'finished', False):
+                        break
+                    continue
+                frame, last_sequence, timestamp = packet
+                self.write(frame, timestamp, last_sequence)
+            else:
+                frame = camera.read_frame()
+                if frame is not None:
+                    self.write(frame)
+                time.sleep(0.033)
+                if frame is None:
+                    continue
+            written += 1
+
+        self.file.flush()
+        return written
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayCamera:
+    def __init__(self, path, realtime=True, speed=1.0, loop=False):
+        self.records = open_recording(path)
+        self.frames = self.records['frame']
+        self.timestamps = self.records['timestamp']
+        frame_shape = self.frames.shape[1:]
+        self.frame_height, self.frame_width = frame_shape[0], frame_shape[1]
+
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        self.running = False
+        self.finished = len(self.records) == 0
+
+        # looped replays keep timestamps increasing by one recording length per pass
+        self.period = 0.0
+        if len(self.timestamps):
+            interval = float(np.median(np.diff(self.timestamps))) if len(self.timestamps) > 1 else 1 / 30
+            self.period = float(self.timestamps[-1] - self.timestamps[0]) + interval
+
+        self.index = -1
+        self.sequence = -1
+        self.loops = 0
+        self.frame_cond = threading.Condition()
+
+    def start(self):
+        self.running = True
+        if self.realtime:
+            self.thread = threading.Thread(target=self._replay_loop, daemon=True)
+            self.thread.start()
+
+    def _replay_loop(self):
+        start_wall = time.time()
+        start_recorded = self.timestamps[0] if len(self.timestamps) else 0.0
+        index = 0
+
+        while self.running and index < len(self.records):
+            due = start_wall + (self.timestamps[index] - start_recorded) / self.speed
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self._advance(index)
+
+            index += 1
+            if index == len(self.records) and self.loop:
+                index = 0
+                start_wall = time.time()
+
+        with self.frame_cond:
+            self.finished = True
+            self.frame_cond.notify_all()
+
+    def _advance(self, index):
+        with self.frame_cond:
+            if index <= self.index:
+                self.loops += 1
+            self.index = index
+            self.sequence += 1
+            self.frame_cond.notify_all()
+
+    def _next_index(self):
+        index = self.index + 1
+        if index >= len(self.records):
+            if not self.loop or len(self.records) == 0:
+                self.finished = True
+                return None
+            index = 0
+        return index
+
+    def _packet(self):
+        return self.frames[self.index], self.sequence, float(self.timestamps[self.index]) + self.loops * self.period
+
+    def read_packet(self):
+        if not self.realtime:
+            index = self._next_index()
+            if index is None:
+                return None
+            self._advance(index)
+
+        with self.frame_cond:
+            return self._packet() if self.index >= 0 else None
+
+    def wait_packet(self, last_sequence=-1, timeout=None):
+        if not self.realtime:
+            packet = self.read_packet()
+            if packet is None:
+                # end of recording: block like a camera with no new frames instead of returning at once
+                with self.frame_cond:
+                    self.frame_cond.wait(timeout)
+            return packet
+
+        with self.frame_cond:
+            if self.sequence <= last_sequence:
+                self.frame_cond.wait(timeout)
+            if self.sequence <= last_sequence:
+                return None
+            return self._packet()
+
+    def read_frame(self):
+        packet = self.read_packet()
+        return packet[0] if packet else None
+
+    def stop(self):
+        self.running = False
+        with self.frame_cond:
+            self.frame_cond.notify_all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kamera karelerini ham kayıt dosyasına yazar")
+    parser.add_argument('output', help="Kayıt dosyası (" + RECORDING_EXTENSION + ")")
+    parser.add_argument('--frames', type=int, default=None)
+    parser.add_argument('--duration', type=float, default=None)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.frames is None and args.duration is None:
+        parser.error("--frames veya --duration gerekli")
+
+    camera = SyntheticCamera(args.width, args.height, args.fps, seed=args.seed)
+    camera.start()
+    try:
+        with FrameRecorder(args.output, (args.height, args.width, 3)) as recorder:
+            written = recorder.record_camera(camera, args.frames, args.duration)
+    finally:
+        camera.stop()
+
+    print(f"{written} kare kaydedildi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
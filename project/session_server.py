@@ -0,0 +1,265 @@
+import argparse
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from eye_tracker import CalibrationSystem, PupilTracker, SyntheticCamera
+
+
+class SharedFrameRing:
+    def __init__(self, shape, slots=4, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = name is None
+
+        header_size = 8 * (1 + 2 * slots)
+        frames_offset = (header_size + 63) // 64 * 64
+        size = frames_offset + slots * int(np.prod(self.shape))
+
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        buf = self.shm.buf
+        self.head = np.ndarray((1,), dtype=np.int64, buffer=buf, offset=0)
+        self.sequences = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=8)
+        self.timestamps = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=8 * (1 + slots))
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=buf, offset=frames_offset)
+
+        if self.owner:
+            self.head[0] = -1
+            self.sequences[:] = -1
+
+    def write(self, frame, timestamp):
+        sequence = int(self.head[0]) + 1
+        slot = sequence % self.slots
+        self.sequences[slot] = -1
+        self.frames[slot] = frame
+        self.timestamps[slot] = timestamp
+        self.sequences[slot] = sequence
+        self.head[0] = sequence
+        return sequence
+
+    def latest_sequence(self):
+        return int(self.head[0])
+
+    def read_latest(self, out):
+        sequence = int(self.head[0])
+        if sequence < 0:
+            return None
+        slot = sequence % self.slots
+        np.copyto(out, self.frames[slot])
+        timestamp = float(self.timestamps[slot])
+        if self.sequences[slot] != sequence:
+            return None
+        return sequence, timestamp
+
+    def close(self):
+        self.head = self.sequences = self.timestamps = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _capture_main(ring_name, shape, slots, fps, seed, frame_event, stop_event):
+    ring = SharedFrameRing(shape, slots, ring_name)
+    camera = SyntheticCamera(shape[1], shape[0], fps or 30, seed=seed, noise=2.0)
+    try:
+        if fps:
+            camera.start()
+            last_sequence = -1
+            while not stop_event.is_set():
+                packet = camera.wait_packet(last_sequence, timeout=0.1)
+                if packet is None:
+                    continue
+                frame, last_sequence, timestamp = packet
+                ring.write(frame, timestamp)
+                frame_event.set()
+            camera.stop()
+        else:
+            while not stop_event.is_set():
+                camera.generate_next()
+                frame, _, timestamp = camera.read_packet()
+                ring.write(frame, timestamp)
+                frame_event.set()
+    finally:
+        ring.close()
+
+
+def _detect_main(session_id, ring_name, shape, slots, calibration_path, frame_event, stop_event,
+                 results, report_interval):
+    ring = SharedFrameRing(shape, slots, ring_name)
+    frame = np.empty(shape, dtype=np.uint8)
+    tracker = PupilTracker()
+    calibration = CalibrationSystem()
+    if calibration_path:
+        calibration.load(calibration_path)
+
+    stats = {'session': session_id, 'frames': 0, 'detected': 0, 'skipped': 0, 'torn': 0,
+             'latency_sum': 0.0, 'gaze': None}
+    last_sequence = -1
+    started = last_report = time.time()
+
+    try:
+        while not stop_event.is_set():
+            frame_event.clear()
+            if ring.latest_sequence() == last_sequence:
+                frame_event.wait(0.1)
+                continue
+
+            packet = ring.read_latest(frame)
+            if packet is None:
+                stats['torn'] += 1
+                continue
+            sequence, timestamp = packet
+            if last_sequence >= 0:
+                stats['skipped'] += sequence - last_sequence - 1
+            last_sequence = sequence
+
+            pupil_data = tracker.update(frame)
+            stats['frames'] += 1
+            if pupil_data[0] is not None:
+                stats['detected'] += 1
+                stats['gaze'] = calibration.map_gaze_to_screen(pupil_data)
+            stats['latency_sum'] += time.time() - timestamp
+
+            now = time.time()
+            if now - last_report >= report_interval:
+                results.put(dict(stats, elapsed=now - started))
+                last_report = now
+    finally:
+        results.put(dict(stats, elapsed=time.time() - started, final=True))
+        ring.close()
+
+
+class SessionServer:
+    def __init__(self, n_sessions, width=640, height=480, fps=30, calibrations=None, slots=4,
+                 report_interval=1.0):
+        self.n_sessions = n_sessions
+        self.shape = (height, width, 3)
+        self.fps = fps
+        self.calibrations = calibrations or []
+        self.slots = slots
+        self.report_interval = report_interval
+
+        self.results = multiprocessing.Queue()
+        self.stop_event = multiprocessing.Event()
+        self.rings = []
+        self.processes = []
+        self.stats = {}
+
+    def start(self):
+        self.stop_event.clear()
+        for session_id in range(self.n_sessions):
+            ring = SharedFrameRing(self.shape, self.slots)
+            frame_event = multiprocessing.Event()
+            calibration = (self.calibrations[session_id % len(self.calibrations)]
+                           if self.calibrations else None)
+            self.rings.append(ring)
+            self.processes.append(multiprocessing.Process(
+                target=_capture_main, daemon=True,
+                args=(ring.name, self.shape, self.slots, self.fps, session_id, frame_event, self.stop_event)))
+            self.processes.append(multiprocessing.Process(
+                target=_detect_main, daemon=True,
+                args=(session_id, ring.name, self.shape, self.slots, calibration, frame_event,
+                      self.stop_event, self.results, self.report_interval)))
+        for process in self.processes:
+            process.start()
+
+    def poll(self, timeout=0.1):
+        updated = []
+        try:
+            while True:
+                stats = self.results.get(timeout=timeout)
+                self.stats[stats['session']] = stats
+                updated.append(stats['session'])
+                timeout = 0
+        except queue.Empty:
+            pass
+        return updated
+
+    def stop(self):
+        self.stop_event.set()
+        deadline = time.time() + 5.0
+        while (time.time() < deadline and
+               sum(1 for stats in self.stats.values() if stats.get('final')) < self.n_sessions):
+            self.poll(0.1)
+        for process in self.processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        for ring in self.rings:
+            ring.close()
+        self.processes = []
+        self.rings = []
+
+    def summary(self):
+        sessions = []
+        for session_id in sorted(self.stats):
+            stats = self.stats[session_id]
+            elapsed = stats['elapsed'] or 1e-9
+            sessions.append({
+                'session': session_id,
+                'fps': stats['frames'] / elapsed,
+                'detect_rate': stats['detected'] / stats['frames'] if stats['frames'] else 0.0,
+                'skipped': stats['skipped'],
+                'latency_ms': 1000 * stats['latency_sum'] / stats['frames'] if stats['frames'] else 0.0
+            })
+        return {
+            'sessions': sessions,
+            'total_fps': sum(session['fps'] for session in sessions)
+        }
+
+    def run(self, duration, report=None):
+        self.start()
+        end_time = time.time() + duration
+        try:
+            while time.time() < end_time:
+                if self.poll(0.2) and report:
+                    report(self.summary())
+        finally:
+            self.stop()
+        return self.summary()
+
+
+def throughput_sweep(session_counts, duration, report=None, **kwargs):
+    results = []
+    for n_sessions in session_counts:
+        summary = SessionServer(n_sessions, **kwargs).run(duration)
+        results.append((n_sessions, summary))
+        if report:
+            report(n_sessions, summary)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paylaşımlı bellek halka tamponlarıyla çok oturumlu takip sunucusu")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[2],
+                        help="Oturum sayısı; birden fazla değer verilirse her biri sırayla ölçülür")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--fps', type=int, default=30, help="Kamera hızı; 0 = beklemeden üret (kapasite ölçümü)")
+    parser.add_argument('--slots', type=int, default=4, help="Oturum başına halka tampon yuvası")
+    parser.add_argument('--calibration', action='append', default=[],
+                        help="Oturum kalibrasyonu (JSON); birden çok verilirse oturumlara sırayla dağıtılır")
+    args = parser.parse_args(argv)
+
+    def report(n_sessions, summary):
+        print(f"{n_sessions} oturum: toplam {summary['total_fps']:.1f} FPS")
+        for session in summary['sessions']:
+            print(f"  oturum {session['session']}: {session['fps']:6.1f} FPS  "
+                  f"tespit %{100 * session['detect_rate']:5.1f}  atlanan {session['skipped']:5d}  "
+                  f"gecikme {session['latency_ms']:6.1f} ms")
+
+    throughput_sweep(args.sessions, args.duration, report, width=args.width, height=args.height,
+                     fps=args.fps, calibrations=args.calibration, slots=args.slots)
+
+
+if __name__ == "__main__":
+    main()
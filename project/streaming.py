@@ -0,0 +1,275 @@
+import argparse
+import collections
+import math
+import os
+import selectors
+import socket
+import struct
+import sys
+import threading
+
+import numpy as np
+
+
+STREAM_MAGIC = b'ETGAZE01'
+SAMPLE_STRUCT = struct.Struct('<Qdddf')
+GAZE_SAMPLE_DTYPE = np.dtype([
+    ('sequence', '<u8'),
+    ('timestamp', '<f8'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('confidence', '<f4'),
+])
+
+
+def parse_address(address):
+    if isinstance(address, tuple) or '/' in address or ':' not in address:
+        return address
+    host, port = address.rsplit(':', 1)
+    return host or '127.0.0.1', int(port)
+
+
+def _family(address):
+    return socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+
+
+class _Client:
+    def __init__(self, sock, max_buffer):
+        self.sock = sock
+        self.queue = collections.deque(maxlen=max_buffer)
+        self.pending = b''
+        self.dropped = 0
+        self.sent = 0
+
+
+class GazePublisher:
+    def __init__(self, address, max_buffer=256):
+        self.address = parse_address(address)
+        self.max_buffer = max_buffer
+        self.clients = []
+        self.lock = threading.Lock()
+        self.selector = selectors.DefaultSelector()
+        self.running = False
+        self.published = 0
+
+    def start(self):
+        family = _family(self.address)
+        if family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+
+        self.server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(self.address)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.address = self.server.getsockname()
+
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_reader.setblocking(False)
+        self.wake_writer.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ, 'accept')
+        self.selector.register(self.wake_reader, selectors.EVENT_READ, 'wake')
+
+        self.running = True
+        self.thread = threading.Thread(target=self._io_loop, daemon=True)
+        self.thread.start()
+        return self.address
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._wake()
+        self.thread.join(timeout=1.0)
+
+        for client in list(self.clients):
+            self._disconnect(client)
+        self.selector.unregister(self.server)
+        self.selector.unregister(self.wake_reader)
+        for sock in (self.server, self.wake_reader, self.wake_writer):
+            sock.close()
+        if _family(self.address) == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def publish(self, sequence, timestamp, x, y, confidence):
+        record = SAMPLE_STRUCT.pack(sequence, timestamp, x, y, confidence)
+        with self.lock:
+            for client in self.clients:
+                if len(client.queue) == client.queue.maxlen:
+                    client.dropped += 1
+                client.queue.append(record)
+            self.published += 1
+        self._wake()
+
+    def publish_sample(self, sample):
+        position = sample.get('filtered_pos') or sample.get('screen_pos')
+        x, y = position if position else (math.nan, math.nan)
+        self.publish(sample.get('sequence') or 0, sample['timestamp'], x, y,
+                     sample.get('confidence', 0.0))
+
+    def _wake(self):
+        try:
+            self.wake_writer.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def _io_loop(self):
+        while self.running:
+            for key, events in self.selector.select(timeout=0.5):
+                if key.data == 'accept':
+                    self._accept()
+                elif key.data == 'wake':
+                    try:
+                        while self.wake_reader.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    if events & selectors.EVENT_READ:
+                        self._read(key.data)
+                    if events & selectors.EVENT_WRITE and key.data in self.clients:
+                        self._flush(key.data)
+
+            for client in list(self.clients):
+                if not client.pending and client.queue:
+                    self._flush(client)
+
+    def _accept(self):
+        try:
+            sock, _ = self.server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock, self.max_buffer)
+        client.pending = STREAM_MAGIC
+        with self.lock:
+            self.clients.append(client)
+        self.selector.register(sock, selectors.EVENT_READ, client)
+        self._flush(client)
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._disconnect(client)
+
+    def _flush(self, client):
+        if not client.pending:
+            with self.lock:
+                client.pending = b''.join(client.queue)
+                client.queue.clear()
+
+        try:
+            sent = client.sock.send(client.pending) if client.pending else 0
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._disconnect(client)
+            return
+
+        client.sent += sent
+        client.pending = client.pending[sent:]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.pending else 0)
+        self.selector.modify(client.sock, events, client)
+
+    def _disconnect(self, client):
+        with self.lock:
+            if client not in self.clients:
+                return
+            self.clients.remove(client)
+        self.selector.unregister(client.sock)
+        client.sock.close()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'published': self.published,
+                'clients': [{'queued': len(client.queue), 'dropped': client.dropped, 'sent_bytes': client.sent}
+                            for client in self.clients]
+            }
+
+
+class GazeSubscriber:
+    def __init__(self, address, timeout=None):
+        address = parse_address(address)
+        self.sock = socket.socket(_family(address), socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self.buffer = b''
+
+        magic = self._read_exact(len(STREAM_MAGIC))
+        if magic != STREAM_MAGIC:
+            raise ValueError("Sunucu bir gaze akışı göndermiyor")
+
+    def _read_exact(self, size):
+        while len(self.buffer) < size:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("Gaze akışı kapandı")
+            self.buffer += data
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def receive(self):
+        while len(self.buffer) < GAZE_SAMPLE_DTYPE.itemsize:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("Gaze akışı kapandı")
+            self.buffer += data
+
+        count = len(self.buffer) // GAZE_SAMPLE_DTYPE.itemsize
+        size = count * GAZE_SAMPLE_DTYPE.itemsize
+        records = np.frombuffer(self.buffer[:size], dtype=GAZE_SAMPLE_DTYPE)
+        self.buffer = self.buffer[size:]
+        return records
+
+    def __iter__(self):
+        while True:
+            yield SAMPLE_STRUCT.unpack(self._read_exact(SAMPLE_STRUCT.size))
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    from eye_tracker import Tracker
+    from recording import ReplayCamera
+
+    parser = argparse.ArgumentParser(description="Gaze örneklerini yerel bir sokete yayınlar")
+    parser.add_argument('address', help="HOST:PORT (TCP) veya Unix soket yolu")
+    parser.add_argument('--calibration', default=None, help="Kaydedilmiş kalibrasyon (JSON)")
+    parser.add_argument('--replay', default=None, help="Canlı kamera yerine oynatılacak kayıt")
+    parser.add_argument('--max-buffer', type=int, default=256, help="İstemci başına kuyruk uzunluğu")
+    args = parser.parse_args(argv)
+
+    camera = ReplayCamera(args.replay, loop=True) if args.replay else None
+    with GazePublisher(args.address, args.max_buffer) as publisher:
+        print(f"Yayın adresi: {publisher.address}", file=sys.stderr)
+        with Tracker(camera, calibration=args.calibration) as tracker:
+            try:
+                for sample in tracker.samples():
+                    publisher.publish_sample(sample)
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == "__main__":
+    main()
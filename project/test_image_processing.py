@@ -0,0 +1,144 @@
+import numpy as np
+
+from eye_tracker import FramePreprocessor, HistogramCache, ImageProcessing, ReferenceImageProcessing
+
+
+def random_shapes(seed, count=12, low=1, high=24):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        yield rng, int(rng.integers(low, high)), int(rng.integers(low, high))
+
+
+def random_gray(rng, height, width):
+    gray = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    if rng.random() < 0.3:
+        gray = gray // 64 * 64
+    return gray
+
+
+def random_binary(rng, height, width):
+    return np.where(rng.random((height, width)) < 0.5, 255, 0).astype(np.uint8)
+
+
+def test_rgb_to_gray():
+    for rng, height, width in random_shapes(0):
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        expected = ReferenceImageProcessing.rgb_to_gray(frame.tolist())
+        np.testing.assert_array_equal(ImageProcessing.rgb_to_gray(frame), expected)
+
+
+def test_adaptive_threshold():
+    for rng, height, width in random_shapes(1):
+        gray = random_gray(rng, height, width)
+        for block_size, c in ((3, 2), (11, 5), (15, 2)):
+            expected = ReferenceImageProcessing.adaptive_threshold(gray.tolist(), block_size, c)
+            np.testing.assert_array_equal(ImageProcessing.adaptive_threshold(gray, block_size, c), expected)
+
+
+def test_clahe():
+    for rng, height, width in random_shapes(2, high=40):
+        gray = random_gray(rng, height, width)
+        for tile_size in (4, 8):
+            expected = ReferenceImageProcessing.clahe(gray.tolist(), 2.0, tile_size)
+            np.testing.assert_array_equal(ImageProcessing.clahe(gray, 2.0, tile_size), expected)
+
+
+def test_erode_dilate():
+    for rng, height, width in random_shapes(3):
+        binary = random_binary(rng, height, width)
+        for kernel_size in (1, 3, 5):
+            np.testing.assert_array_equal(ImageProcessing.erode(binary, kernel_size),
+                                          ReferenceImageProcessing.erode(binary.tolist(), kernel_size))
+            np.testing.assert_array_equal(ImageProcessing.dilate(binary, kernel_size),
+                                          ReferenceImageProcessing.dilate(binary.tolist(), kernel_size))
+
+
+def test_sobel_edges():
+    for rng, height, width in random_shapes(4):
+        gray = random_gray(rng, height, width)
+        np.testing.assert_array_equal(ImageProcessing.sobel_edges(gray),
+                                      ReferenceImageProcessing.sobel_edges(gray.tolist()))
+
+
+def test_crop_eye_region():
+    for rng, height, width in random_shapes(5):
+        gray = random_gray(rng, height, width)
+        for _ in range(4):
+            x, y = rng.integers(-5, width + 5), rng.integers(-5, height + 5)
+            w, h = rng.integers(0, width + 5), rng.integers(0, height + 5)
+            expected = ReferenceImageProcessing.crop_eye_region(gray.tolist(), x, y, w, h)
+            np.testing.assert_array_equal(ImageProcessing.crop_eye_region(gray, x, y, w, h), expected)
+
+
+def random_blobs(rng, height, width):
+    noise = rng.random((height + 4, width + 4))
+    smooth = sum(noise[dy:dy + height, dx:dx + width] for dy in range(5) for dx in range(5))
+    return np.where(smooth > np.median(smooth), 255, 0).astype(np.uint8)
+
+
+def test_label_components_matches_contours():
+    for rng, height, width in random_shapes(6, count=8, low=8, high=64):
+        binary = random_blobs(rng, height, width)
+        expected = []
+        for points in ReferenceImageProcessing.find_contours(binary.tolist()):
+            rows, cols = np.array(points).T
+            expected.append((len(points), cols.mean(), rows.mean(),
+                             (cols.min(), rows.min(), cols.max() - cols.min() + 1, rows.max() - rows.min() + 1)))
+
+        blobs = ImageProcessing.label_components(binary, min_area=50)
+        actual = [(blob['area'], *blob['centroid'], blob['bbox']) for blob in blobs]
+
+        assert len(actual) == len(expected)
+        for (area, cx, cy, bbox), (ref_area, ref_cx, ref_cy, ref_bbox) in zip(sorted(actual), sorted(expected)):
+            assert (area, bbox) == (ref_area, ref_bbox)
+            assert np.isclose(cx, ref_cx) and np.isclose(cy, ref_cy)
+
+
+def test_preprocessor_matches_clahe_threshold():
+    preprocessor = FramePreprocessor()
+    for rng, height, width in random_shapes(7, count=20, high=90):
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        gray = ImageProcessing.rgb_to_gray(frame)
+        np.testing.assert_array_equal(preprocessor.gray_region(frame, 0, 0, width, height), gray)
+
+        for block_size in (3, 11):
+            enhanced = preprocessor.enhance(gray, block_size)
+            expected = ImageProcessing.clahe(gray)
+            np.testing.assert_array_equal(enhanced, expected)
+            np.testing.assert_array_equal(preprocessor.threshold(enhanced, block_size, 5),
+                                          ImageProcessing.adaptive_threshold(expected, block_size, 5))
+
+
+def test_histogram_cache_exact_without_tolerance():
+    for rng, height, width in random_shapes(8, count=8, low=16, high=80):
+        frame = random_gray(rng, height, width)
+        cache = HistogramCache(tolerance=0)
+        for _ in range(6):
+            frame = frame.copy()
+            y, x = rng.integers(0, height), rng.integers(0, width)
+            frame[y:y + 5, x:x + 5] = rng.integers(0, 256)
+
+            y0, x0 = 8 * int(rng.integers(0, height // 8)), 8 * int(rng.integers(0, width // 8))
+            region = frame[y0:y0 + int(rng.integers(1, 48)), x0:x0 + int(rng.integers(1, 48))]
+            cache.update(region, y0, x0, frame.shape)
+
+            np.testing.assert_array_equal(cache.clahe_luts(), ImageProcessing.clahe_tile_luts(region))
+            np.testing.assert_array_equal(cache.histogram(), ImageProcessing.compute_histogram(region))
+            assert (np.array_equal(ImageProcessing.manual_threshold(region, cache.otsu_level()),
+                                   ImageProcessing.otsu_threshold(region)))
+
+        assert cache.update(region, y0, x0, frame.shape) == 0
+        assert cache.hits >= cache.tiles
+
+
+def test_preprocessor_hit_rate_sums_caches():
+    rng = np.random.default_rng(9)
+    preprocessor = FramePreprocessor(histogram_tolerance=0)
+    for frame in (random_gray(rng, 48, 64), random_gray(rng, 40, 40)):
+        cache = preprocessor.histogram_cache(frame)
+        for _ in range(3):
+            preprocessor.enhance(frame[8:40, 8:32], 11, cache, 8, 8, frame.shape)
+
+    caches = preprocessor.histograms.values()
+    assert [(cache.hits, cache.misses) for cache in caches] == [(24, 12), (24, 12)]
+    assert preprocessor.histogram_hit_rate() == 48 / 72
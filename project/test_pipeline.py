@@ -0,0 +1,46 @@
+import time
+
+from eye_tracker import SyntheticCamera
+from pipeline import TrackingPipeline
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_packet_valid_until_slot_reused():
+    camera = SyntheticCamera(64, 48, ring_size=4, seed=0)
+    camera.generate_next()
+    _, sequence, _ = camera.read_packet()
+    for _ in range(3):
+        camera.generate_next()
+    assert camera.packet_valid(sequence)
+    camera.generate_next()
+    assert not camera.packet_valid(sequence)
+
+
+def test_pipeline_drops_frames_overwritten_during_detect():
+    camera = SyntheticCamera(64, 48, ring_size=4, seed=0)
+
+    def detect(frame):
+        # a detector slower than the ring: four newer frames reuse the slot being read
+        if pipeline.counts['detected'] + pipeline.counts['torn'] == 0:
+            for _ in range(4):
+                camera.generate_next()
+        return {'mean': float(frame.mean())}
+
+    pipeline = TrackingPipeline(camera, detect, lambda pupil_data: (0.0, 0.0))
+    pipeline.start()
+    try:
+        camera.generate_next()
+        assert wait_for(lambda: pipeline.counts['torn'] == 1)
+        camera.generate_next()
+        assert wait_for(lambda: pipeline.counts['mapped'] >= 1)
+    finally:
+        pipeline.stop()
+
+    sample = pipeline.latest()
+    assert sample is not None and camera.packet_valid(sample['sequence'])
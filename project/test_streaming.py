@@ -0,0 +1,64 @@
+import socket
+import threading
+import time
+
+import numpy as np
+
+from streaming import GAZE_SAMPLE_DTYPE, SAMPLE_STRUCT, STREAM_MAGIC, GazePublisher, GazeSubscriber, parse_address
+
+
+def test_parse_address():
+    assert parse_address('127.0.0.1:5000') == ('127.0.0.1', 5000)
+    assert parse_address(':5000') == ('127.0.0.1', 5000)
+    assert parse_address('/tmp/gaze.sock') == '/tmp/gaze.sock'
+    assert parse_address('gaze.sock') == 'gaze.sock'
+
+
+def test_receive_completes_partial_record():
+    records = b''.join(SAMPLE_STRUCT.pack(index, index * 0.5, index, -index, 0.9) for index in range(4))
+    split = GAZE_SAMPLE_DTYPE.itemsize + 10
+    server = socket.create_server(('127.0.0.1', 0))
+    resume = threading.Event()
+
+    def serve():
+        connection, _ = server.accept()
+        with connection:
+            connection.sendall(STREAM_MAGIC + records[:split])
+            resume.wait(5.0)
+            connection.sendall(records[split:])
+            resume.clear()
+            resume.wait(5.0)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    with GazeSubscriber(server.getsockname(), timeout=5.0) as subscriber:
+        received = [subscriber.receive()]
+        assert len(received[0]) == 1 and len(subscriber.buffer) == 10
+        resume.set()
+        for _ in range(8):
+            if sum(map(len, received)) == 4:
+                break
+            received.append(subscriber.receive())
+        resume.set()
+
+    thread.join(5.0)
+    server.close()
+    samples = np.concatenate(received)
+    np.testing.assert_array_equal(samples['sequence'], np.arange(4))
+    np.testing.assert_array_equal(samples['y'], -np.arange(4))
+
+
+def test_publisher_unix_socket(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with GazePublisher('gaze.sock') as publisher:
+        with GazeSubscriber('gaze.sock', timeout=5.0) as subscriber:
+            while not publisher.stats()['clients']:
+                time.sleep(0.01)
+            for index in range(3):
+                publisher.publish(index, float(index), 1.0, 2.0, 0.5)
+            samples = subscriber.receive()
+            while len(samples) < 3:
+                samples = np.concatenate([samples, subscriber.receive()])
+
+    assert samples['sequence'].tolist() == [0, 1, 2]
+    assert not (tmp_path / 'gaze.sock').exists()